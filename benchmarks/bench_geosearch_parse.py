@@ -0,0 +1,71 @@
+"""
+Compares parsing a large Geosearch response as a whole (response.json())
+with streaming extraction of its features (utils/json_stream.py).
+
+Usage: python -m benchmarks.bench_geosearch_parse [N_FEATURES] [CHUNK_KB]
+"""
+import json
+import sys
+import time
+import tracemalloc
+
+from utils.json_stream import iter_array_items
+
+FIXTURE = "benchmarks/fixtures/geosearch.json"
+
+
+def synthesize_body(n_features):
+    """Builds a FeatureCollection of ``n_features`` by repeating the fixture features."""
+    with open(FIXTURE, encoding="utf-8") as f:
+        template = json.load(f)
+    base = template["features"]
+    features = []
+    for i in range(n_features):
+        feature = json.loads(json.dumps(base[i % len(base)]))
+        feature["properties"]["CompanyMetaData"]["id"] = str(i)
+        features.append(feature)
+    template["features"] = features
+    return json.dumps(template, ensure_ascii=False).encode("utf-8")
+
+
+def chunked(body, chunk_size):
+    for start in range(0, len(body), chunk_size):
+        yield body[start:start + chunk_size]
+
+
+def measure(func):
+    """Returns (seconds, peak traced memory in bytes, result)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def parse_full(body):
+    # What requests' response.json() does: decode the text, then parse everything
+    features = json.loads(body.decode("utf-8"))["features"]
+    return [feature["geometry"]["coordinates"] for feature in features]
+
+
+def parse_streaming(body, chunk_size):
+    return [feature["geometry"]["coordinates"]
+            for feature in iter_array_items(chunked(body, chunk_size), "features")]
+
+
+if __name__ == "__main__":
+    n_features = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    chunk_size = (int(sys.argv[2]) if len(sys.argv) > 2 else 64) * 1024
+
+    body = synthesize_body(n_features)
+    print(f"Организаций: {n_features}, ответ: {len(body) / 2**20:.1f} МБ, "
+          f"блок чтения: {chunk_size // 1024} КБ\n")
+
+    full_s, full_peak, expected = measure(lambda: parse_full(body))
+    print(f"{'json.loads (весь ответ)':<34}{full_s * 1000:10.1f} ms{full_peak / 2**20:10.1f} MB peak")
+
+    stream_s, stream_peak, result = measure(lambda: parse_streaming(body, chunk_size))
+    assert result == expected, "streaming parser returned different coordinates"
+    print(f"{'потоково (по одной организации)':<34}{stream_s * 1000:10.1f} ms{stream_peak / 2**20:10.1f} MB peak")
@@ -0,0 +1,76 @@
+"""
+Compares the scalar haversine_distance with the NumPy batch variants.
+
+Usage: python -m benchmarks.bench_haversine [N_CANDIDATES] [N_SOURCES]
+"""
+import sys
+import time
+
+import numpy as np
+
+from utils.geo_utils import (
+    haversine_distance, haversine_one_to_many, haversine_matrix,
+    nearest_k, nearest_k_matrix
+)
+
+MOSCOW_CENTER = (37.617635, 55.755814)
+SPREAD_DEG = 0.3  # Candidates are scattered ~±20 km around the center
+TOP_K = 10
+
+
+def random_points(rng, n):
+    lon = MOSCOW_CENTER[0] + rng.uniform(-SPREAD_DEG, SPREAD_DEG, n)
+    lat = MOSCOW_CENTER[1] + rng.uniform(-SPREAD_DEG, SPREAD_DEG, n)
+    return np.column_stack([lon, lat])
+
+
+def timed(func, repeat=5):
+    """Returns (best time in seconds, result of the last run)."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def report(name, scalar_s, vector_s):
+    print(f"{name:<28} scalar {scalar_s * 1000:10.2f} ms   numpy {vector_s * 1000:8.2f} ms"
+          f"   x{scalar_s / vector_s:,.0f}")
+
+
+if __name__ == "__main__":
+    n_candidates = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    n_sources = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    rng = np.random.default_rng(42)
+    candidates = random_points(rng, n_candidates)
+    sources = random_points(rng, n_sources)
+    candidate_tuples = [tuple(p) for p in candidates.tolist()]
+    source_tuples = [tuple(p) for p in sources.tolist()]
+
+    print(f"Кандидатов: {n_candidates}, исходных точек: {n_sources}, top-k: {TOP_K}\n")
+
+    # One-to-many
+    scalar_s, scalar_d = timed(lambda: [haversine_distance(MOSCOW_CENTER, p) for p in candidate_tuples])
+    vector_s, vector_d = timed(lambda: haversine_one_to_many(MOSCOW_CENTER, candidates))
+    report("one-to-many", scalar_s, vector_s)
+    max_error_m = np.max(np.abs(np.array(scalar_d) - vector_d)) * 1000
+
+    # Top-k nearest for one point
+    scalar_s, _ = timed(lambda: sorted(
+        range(n_candidates), key=lambda i: haversine_distance(MOSCOW_CENTER, candidate_tuples[i]))[:TOP_K])
+    vector_s, _ = timed(lambda: nearest_k(MOSCOW_CENTER, candidates, TOP_K))
+    report(f"nearest {TOP_K} (one point)", scalar_s, vector_s)
+
+    # Matrix and per-row top-k (scalar loop timed once, it is slow)
+    scalar_s, scalar_m = timed(
+        lambda: [[haversine_distance(s, c) for c in candidate_tuples] for s in source_tuples], repeat=1)
+    vector_s, vector_m = timed(lambda: haversine_matrix(sources, candidates))
+    report(f"matrix {n_sources}x{n_candidates}", scalar_s, vector_s)
+    max_error_m = max(max_error_m, np.max(np.abs(np.array(scalar_m) - vector_m)) * 1000)
+
+    vector_s, _ = timed(lambda: nearest_k_matrix(sources, candidates, TOP_K))
+    print(f"{'nearest ' + str(TOP_K) + ' (matrix)':<28} numpy {vector_s * 1000:8.2f} ms")
+
+    print(f"\nМаксимальное расхождение с haversine_distance: {max_error_m:.6f} м")
@@ -0,0 +1,81 @@
+"""
+Import-time budget for the CLI entry points.
+
+Each module is imported in a fresh interpreter with ``python -X importtime``;
+the median cumulative import time over several runs is compared with its
+budget. Heavy dependencies (NumPy, Pillow, pygame, requests) must not be
+imported at all: they are loaded only on the code paths that use them.
+
+Usage: python -m benchmarks.bench_import_time [-n 7] [entry points...]
+
+The exit code is 1 if any entry point exceeds its budget or loads a heavy
+dependency, so the script can gate CI.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+# Entry point -> import-time budget, ms
+ENTRY_POINTS = {
+    "tasks.task_01_search_and_show": 60,
+    "tasks.task_02_find_and_show_pharmacy": 60,
+    "tasks.task_03_find_10_pharmacies": 60,
+    "tasks.task_04_find_district": 60,
+    "tasks.task_05_guess_city_game": 60,
+    "tasks.bulk_geocode": 120,  # asyncio alone takes a good part of it
+    "tasks.service": 120,
+}
+HEAVY_MODULES = ("numpy", "PIL.Image", "pygame", "requests")
+
+# Prints which of the heavy modules were imported; one requested through
+# utils.lazy.lazy_import but never touched is not in sys.modules
+_CHECK_LOADED = (
+    "import importlib, sys; importlib.import_module(sys.argv[1]); "
+    "print(*[m for m in sys.argv[2:] if m in sys.modules])"
+)
+
+
+def import_time_ms(module):
+    """Cumulative import time of ``module`` in a fresh interpreter, ms."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True
+    )
+    for line in reversed(result.stderr.splitlines()):
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000
+    raise RuntimeError(f"no importtime line for {module}")
+
+
+def loaded_heavy_modules(module):
+    """Heavy modules that were really imported (not just requested lazily) by the import."""
+    result = subprocess.run(
+        [sys.executable, "-c", _CHECK_LOADED, module, *HEAVY_MODULES],
+        capture_output=True, text=True, check=True
+    )
+    return result.stdout.split()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Время импорта точек входа и бюджет на него.")
+    parser.add_argument("-n", "--repeat", type=int, default=7, help="Запусков на каждую точку входа")
+    parser.add_argument("entry_points", nargs="*", help="Какие модули проверять (по умолчанию все)")
+    args = parser.parse_args()
+
+    failed = []
+    print(f"{'entry point':<40}{'median ms':>10}{'max ms':>10}{'budget ms':>10}  heavy modules")
+    for module in args.entry_points or list(ENTRY_POINTS):
+        budget = ENTRY_POINTS.get(module, 60)
+        times = [import_time_ms(module) for _ in range(args.repeat)]
+        heavy = loaded_heavy_modules(module)
+        median = statistics.median(times)
+        status = "" if median <= budget and not heavy else "  <- превышение"
+        print(f"{module:<40}{median:>10.1f}{max(times):>10.1f}{budget:>10}  {' '.join(heavy) or '-'}{status}")
+        if status:
+            failed.append(module)
+
+    if failed:
+        print(f"\nБюджет времени импорта превышен: {', '.join(failed)}")
+        sys.exit(1)
@@ -0,0 +1,158 @@
+"""
+End-to-end latency/throughput benchmark of the task pipelines against the
+local mock API servers (benchmarks/mock_server.py).
+
+Pipelines:
+    task_01: geocode -> map params -> static map
+    task_02: geocode -> nearest pharmacy -> distance -> static map
+    task_03: geocode -> 10 pharmacies -> marker styles -> static map
+    task_04: geocode (district from address components; reverse geocode only if missing)
+
+Usage: python -m benchmarks.bench_pipelines [-n 50] [-c 1] [--latency-ms 20] [--warm]
+       [--budget-p95-ms 200] [--metrics]
+
+By default caches are disabled (every run goes to the mock servers);
+--warm keeps them on. --metrics adds a per-endpoint breakdown of where
+each pipeline spends its time (utils/metrics.py). With --budget-p95-ms
+the exit code is 1 if any pipeline's p95 exceeds the budget, so the
+script can gate CI.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.mock_server import start_mock_servers, server_environment
+
+ADDRESS = "Москва, улица Льва Толстого, 16"
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return float("nan")
+    rank = max(1, -(-len(sorted_values) * q // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def build_pipelines():
+    # Imported here: utils.config reads server URLs and cache settings from
+    # the environment at import time, so the mock setup must come first
+    from tasks import (
+        task_01_search_and_show as task_01,
+        task_02_find_and_show_pharmacy as task_02,
+        task_03_find_10_pharmacies as task_03,
+        task_04_find_district as task_04,
+    )
+    from utils.geo_utils import haversine_distance
+    from utils.map_utils import get_map_params
+
+    def check(value, step):
+        if not value:
+            raise RuntimeError(f"шаг '{step}' не вернул результат")
+        return value
+
+    def pipeline_task_01():
+        toponym = check(task_01.geocode_address(ADDRESS), "geocode")
+        map_params = check(get_map_params(toponym), "map params")
+        check(task_01.get_static_map_image(map_params, toponym.coords), "static map")
+
+    def pipeline_task_02():
+        start = check(task_02.geocode_address(ADDRESS), "geocode")
+        pharmacy = check(task_02.find_nearest_organization(start, "аптека"), "geosearch")
+        haversine_distance(start, pharmacy.coords)
+        check(task_02.get_static_map_with_points([
+            (start[0], start[1], "pm2blm"),
+            (pharmacy.lon, pharmacy.lat, "pm2rdm")
+        ]), "static map")
+
+    def pipeline_task_03():
+        start = check(task_03.geocode_address(ADDRESS), "geocode")
+        pharmacies = check(task_03.find_organizations(start, "аптека", num_results=10), "geosearch")
+        points = [(org.lon, org.lat, task_03.get_marker_style(org)) for org in pharmacies]
+        check(task_03.get_static_map_with_points(points), "static map")
+
+    def pipeline_task_04():
+        check(task_04.get_object_by_address(ADDRESS, "district"), "district")
+
+    return {
+        "task_01": pipeline_task_01,
+        "task_02": pipeline_task_02,
+        "task_03": pipeline_task_03,
+        "task_04": pipeline_task_04,
+    }
+
+
+def timed_call(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def run_pipeline(func, iterations, concurrency, servers):
+    """Runs a pipeline and returns (sorted latencies in s, wall time in s, upstream requests)."""
+    requests_before = sum(server.request_count for server in servers.values())
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = sorted(executor.map(lambda _: timed_call(func), range(iterations)))
+    wall = time.perf_counter() - start
+    upstream = sum(server.request_count for server in servers.values()) - requests_before
+    return latencies, wall, upstream
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк конвейеров задач на локальном mock-сервере.")
+    parser.add_argument("-n", "--iterations", type=int, default=50, help="Прогонов каждого конвейера")
+    parser.add_argument("-c", "--concurrency", type=int, default=1, help="Параллельных прогонов")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Задержка mock-сервера, мс")
+    parser.add_argument("--jitter-ms", type=float, default=5.0, help="Разброс задержки, мс")
+    parser.add_argument("--warm", action="store_true", help="Не отключать кэши")
+    parser.add_argument("--rate-limit", action="store_true",
+                        help="Оставить ограничение частоты запросов из utils/config.py")
+    parser.add_argument("--metrics", action="store_true", help="Разбивка времени по эндпоинтам API")
+    parser.add_argument("--budget-p95-ms", type=float, help="Порог p95, мс (код выхода 1 при превышении)")
+    parser.add_argument("pipelines", nargs="*", help="Какие конвейеры запускать (по умолчанию все)")
+    args = parser.parse_args()
+
+    mock_servers = start_mock_servers(args.latency_ms, args.jitter_ms)
+    os.environ.update(server_environment(mock_servers))
+    os.environ["YANDEX_MAPS_CACHE_DIR"] = tempfile.mkdtemp(prefix="yandex-maps-bench-")
+    os.environ["YANDEX_MAPS_CACHE"] = "1" if args.warm else "0"
+    os.environ["YANDEX_MAPS_LOG_LEVEL"] = "WARNING"  # Task progress messages would drown the table
+
+    if not args.rate_limit:
+        from utils import api_client
+        api_client.HTTP_RATE_LIMIT_PER_SECOND = 1e9
+        api_client.HTTP_RATE_LIMIT_BURST = 1e9
+
+    pipelines = build_pipelines()
+    from utils.metrics import metrics
+    selected = args.pipelines or list(pipelines)
+
+    print(f"Прогонов: {args.iterations}, параллельно: {args.concurrency}, "
+          f"задержка: {args.latency_ms}±{args.jitter_ms} мс, кэши: {'вкл' if args.warm else 'выкл'}\n")
+    print(f"{'pipeline':<10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'runs/s':>10}{'req/s':>10}{'req/run':>10}")
+
+    over_budget = []
+    breakdowns = {}
+    for name in selected:
+        metrics.reset()
+        latencies, wall, upstream = run_pipeline(pipelines[name], args.iterations, args.concurrency, mock_servers)
+        p50, p95, p99 = (percentile(latencies, q) * 1000 for q in (50, 95, 99))
+        print(f"{name:<10}{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}"
+              f"{args.iterations / wall:>10.1f}{upstream / wall:>10.1f}{upstream / args.iterations:>10.1f}")
+        breakdowns[name] = metrics.summary_lines()
+        if args.budget_p95_ms is not None and p95 > args.budget_p95_ms:
+            over_budget.append(name)
+
+    if args.metrics:
+        for name, lines in breakdowns.items():
+            print(f"\n{name}:")
+            for line in lines:
+                print(f"  {line}")
+
+    if over_budget:
+        print(f"\nПревышен бюджет p95 ({args.budget_p95_ms} мс): {', '.join(over_budget)}")
+        sys.exit(1)
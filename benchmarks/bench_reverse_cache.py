@@ -0,0 +1,94 @@
+"""
+Validates the geohash-quantized reverse geocoding cache (utils/geocoder.py).
+
+Every point is reverse geocoded exactly (cached by its own coordinates, so
+reruns don't use the quota); then, for each geohash precision, the cache is
+replayed over the points in order: the first point of a cell fills it, later
+points of the cell get that answer. The report shows how many requests each
+precision needs, the share of lookups served locally and how often the
+cell's answer differs from the point's own one.
+
+Unlike the other benchmarks this talks to the configured Geocoder (the mock
+server answers every point with the same district).
+
+Usage: python -m benchmarks.bench_reverse_cache [--kind district] [-c 8]
+       [--points points.txt | --random 500] [--precisions 4 5 6 7 8]
+
+points.txt holds one "lon,lat" per line. --random generates GPS-like points
+clustered around a few centers in Moscow.
+"""
+import argparse
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.config import REVERSE_GEOCODE_GEOHASH_PRECISION
+from utils.geo_utils import geohash_encode, geohash_cell_size_km
+from utils.geocoder import fetch_geocoder_json, first_geo_object
+
+MOSCOW_CENTER = (37.617635, 55.755814)
+CLUSTERS = 8
+CLUSTER_SPREAD_DEG = 0.01  # ~1 km around each cluster center
+CENTER_SPREAD_DEG = 0.15
+
+
+def random_points(n, seed=42):
+    rng = random.Random(seed)
+    centers = [(MOSCOW_CENTER[0] + rng.uniform(-CENTER_SPREAD_DEG, CENTER_SPREAD_DEG),
+                MOSCOW_CENTER[1] + rng.uniform(-CENTER_SPREAD_DEG, CENTER_SPREAD_DEG)) for _ in range(CLUSTERS)]
+    points = []
+    for _ in range(n):
+        lon, lat = rng.choice(centers)
+        points.append((lon + rng.gauss(0, CLUSTER_SPREAD_DEG), lat + rng.gauss(0, CLUSTER_SPREAD_DEG / 2)))
+    return points
+
+
+def read_points(path):
+    with open(path, encoding="utf-8") as f:
+        return [tuple(map(float, line.split(","))) for line in f if line.strip()]
+
+
+def exact_name(point, kind):
+    """The object of ``kind`` at exactly this point (None if nothing is found)."""
+    geo_object = first_geo_object(fetch_geocoder_json(f"{point[0]},{point[1]}", kind=kind, results=1,
+                                                      quantize=False))
+    return geo_object.name if geo_object is not None else None
+
+
+def replay(points, names, precision):
+    """Returns (requests, mismatches) of a quantized cache filled in point order."""
+    cells = {}
+    mismatches = 0
+    for point, name in zip(points, names):
+        cell = geohash_encode(point[0], point[1], precision)
+        if cell not in cells:
+            cells[cell] = name
+        elif cells[cell] != name:
+            mismatches += 1
+    return len(cells), mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Точность кэша обратного геокодирования по ячейкам geohash.")
+    parser.add_argument("--kind", default="district", help="Тип объекта (по умолчанию district)")
+    parser.add_argument("--points", help="Файл с точками 'lon,lat' по одной на строку")
+    parser.add_argument("--random", type=int, default=300, help="Сколько случайных точек (если нет --points)")
+    parser.add_argument("--precisions", type=int, nargs="*", help="Проверяемые длины geohash")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="Одновременных запросов")
+    args = parser.parse_args()
+
+    points = read_points(args.points) if args.points else random_points(args.random)
+    configured = REVERSE_GEOCODE_GEOHASH_PRECISION.get(args.kind)
+    precisions = args.precisions or sorted({p for p in (4, 5, 6, 7, 8, configured) if p})
+
+    print(f"Точек: {len(points)}, kind={args.kind}, точное обратное геокодирование...")
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        names = list(executor.map(lambda point: exact_name(point, args.kind), points))
+
+    mean_lat = sum(lat for _, lat in points) / len(points)
+    print(f"\n{'precision':>9}{'cell km':>14}{'requests':>10}{'local %':>9}{'wrong %':>9}")
+    for precision in precisions:
+        width, height = geohash_cell_size_km(precision, mean_lat)
+        requests, mismatches = replay(points, names, precision)
+        marker = "  <- настроено" if precision == configured else ""
+        print(f"{precision:>9}{f'{width:.2f}x{height:.2f}':>14}{requests:>10}"
+              f"{100 * (1 - requests / len(points)):>9.1f}{100 * mismatches / len(points):>9.2f}{marker}")
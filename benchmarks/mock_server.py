@@ -0,0 +1,157 @@
+"""
+Local stand-in for the Yandex Geocoder, Geosearch and Static Maps APIs.
+
+Serves recorded fixtures from benchmarks/fixtures/ with configurable latency.
+Each API gets its own port, like the real servers have their own hosts, so
+per-server connection pools and rate limiters behave as in production.
+
+Usage: python -m benchmarks.mock_server [--latency-ms 50] [--jitter-ms 10]
+Then run tasks with the printed environment variables.
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from io import BytesIO
+from urllib.parse import urlsplit, parse_qs
+
+from PIL import Image
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def _load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+class MockApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, handler_class, latency_ms=0.0, jitter_ms=0.0):
+        super().__init__(("127.0.0.1", 0), handler_class)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.request_count = 0
+        self._count_lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}{self.RequestHandlerClass.path_prefix}"
+
+    def count_request(self):
+        with self._count_lock:
+            self.request_count += 1
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real APIs
+    disable_nagle_algorithm = True  # Headers and body are separate writes
+    path_prefix = "/"
+
+    def do_GET(self):
+        self.server.count_request()
+        delay_ms = self.server.latency_ms + random.uniform(-self.server.jitter_ms, self.server.jitter_ms)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+
+        params = {name: values[-1] for name, values in parse_qs(urlsplit(self.path).query).items()}
+        content_type, body = self.build_body(params)
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def build_body(self, params):
+        raise NotImplementedError
+
+    def log_message(self, format, *args):
+        pass
+
+
+class GeocoderHandler(_FixtureHandler):
+    path_prefix = "/1.x/"
+    forward = json.dumps(_load_fixture("geocoder.json"), ensure_ascii=False).encode("utf-8")
+    reverse = json.dumps(_load_fixture("geocoder_district.json"), ensure_ascii=False).encode("utf-8")
+
+    def build_body(self, params):
+        is_reverse = "kind" in params and "," in params.get("geocode", "") and \
+            params["geocode"].replace(",", "").replace(".", "").replace("-", "").isdigit()
+        return "application/json; charset=utf-8", self.reverse if is_reverse else self.forward
+
+
+class GeosearchHandler(_FixtureHandler):
+    path_prefix = "/v1/"
+    collection = _load_fixture("geosearch.json")
+
+    def build_body(self, params):
+        results = int(params.get("results", 10))
+        skip = int(params.get("skip", 0))
+        page = dict(self.collection)
+        page["features"] = self.collection["features"][skip:skip + results]
+        return "application/json; charset=utf-8", json.dumps(page, ensure_ascii=False).encode("utf-8")
+
+
+class StaticMapsHandler(_FixtureHandler):
+    path_prefix = "/v1"
+    _images = {}
+    _images_lock = threading.Lock()
+
+    def build_body(self, params):
+        size = params.get("size", "600,450")
+        with self._images_lock:
+            image = self._images.get(size)
+            if image is None:
+                width, height = map(int, size.split(","))
+                buffer = BytesIO()
+                Image.new("RGB", (width, height), (236, 232, 222)).save(buffer, format="PNG")
+                image = self._images[size] = buffer.getvalue()
+        return "image/png", image
+
+
+def start_mock_servers(latency_ms=0.0, jitter_ms=0.0):
+    """
+    Starts the three mock API servers in background threads.
+
+    Returns:
+        dict: {"geocoder": server, "geosearch": server, "static_maps": server}.
+    """
+    servers = {
+        "geocoder": MockApiServer(GeocoderHandler, latency_ms, jitter_ms),
+        "geosearch": MockApiServer(GeosearchHandler, latency_ms, jitter_ms),
+        "static_maps": MockApiServer(StaticMapsHandler, latency_ms, jitter_ms),
+    }
+    for server in servers.values():
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    return servers
+
+
+def server_environment(servers):
+    """Environment variables that point utils.config at the mock servers."""
+    return {
+        "YANDEX_GEOCODER_API_SERVER": servers["geocoder"].url,
+        "YANDEX_GEOSEARCH_API_SERVER": servers["geosearch"].url,
+        "YANDEX_STATIC_MAPS_API_SERVER": servers["static_maps"].url,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Локальный mock-сервер API Яндекс.Карт.")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Задержка ответа, мс")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Случайный разброс задержки, мс")
+    args = parser.parse_args()
+
+    mock_servers = start_mock_servers(args.latency_ms, args.jitter_ms)
+    print("Mock-серверы запущены. Для запуска задач против них:")
+    for name, value in server_environment(mock_servers).items():
+        print(f"  export {name}={value}")
+    print("Ctrl+C для остановки.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print("\nОстановлено.")
@@ -0,0 +1,105 @@
+import argparse
+import asyncio
+import json
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.api_client import get_session
+from utils.config import GEOCODER_API_SERVER, HTTP_POOL_SIZE
+from utils.geocoder import fetch_geocoder_json, first_geo_object
+from utils.log import get_logger
+
+logger = get_logger("bulk_geocode")
+
+# How many results may wait in memory for an earlier, still running lookup
+# (per unit of concurrency). Bounds memory while keeping output in input order.
+WINDOW_FACTOR = 4
+
+
+def geocode_one(index, address):
+    """
+    Geocodes a single address (blocking; runs in a worker thread).
+    Returns a JSON-serializable record tagged with the input line index.
+    """
+    record = {"index": index, "query": address}
+    try:
+        toponym = first_geo_object(fetch_geocoder_json(address))
+        if toponym is None:
+            record["error"] = "not found"
+        else:
+            record["lon"], record["lat"] = toponym.coords
+            record["address"] = toponym.address
+    except Exception as e:
+        record["error"] = str(e)
+    return record
+
+
+async def geocode_stream(addresses, concurrency):
+    """
+    Geocodes (index, address) pairs concurrently and yields records in input order.
+
+    At most ``concurrency`` requests run at once and at most
+    ``concurrency * WINDOW_FACTOR`` addresses are in flight, so neither the
+    input nor the output is ever held in memory as a whole.
+    """
+    loop = asyncio.get_running_loop()
+    window = concurrency * WINDOW_FACTOR
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for index, address in addresses:
+            pending.append(loop.run_in_executor(executor, geocode_one, index, address))
+            if len(pending) >= window:
+                yield await pending.popleft()
+        while pending:
+            yield await pending.popleft()
+
+
+def read_addresses(input_file):
+    """Lazily yields (line_index, address) for non-empty input lines."""
+    for index, line in enumerate(input_file):
+        address = line.strip()
+        if address:
+            yield index, address
+
+
+async def run(input_file, output_file, concurrency):
+    # Size the connection pool to the number of workers before the first request
+    get_session(GEOCODER_API_SERVER, pool_size=concurrency)
+
+    total, failed = 0, 0
+    async for record in geocode_stream(read_addresses(input_file), concurrency):
+        output_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        output_file.flush()
+        total += 1
+        if "error" in record:
+            failed += 1
+        if total % 1000 == 0:
+            logger.info(f"Обработано адресов: {total}")
+    return total, failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Массовое геокодирование: по адресу на строку, результат в JSONL."
+    )
+    parser.add_argument("input", help="Файл с адресами ('-' для stdin)")
+    parser.add_argument("-o", "--output", default="-", help="Файл JSONL для результатов ('-' для stdout)")
+    parser.add_argument("-c", "--concurrency", type=int, default=HTTP_POOL_SIZE,
+                        help=f"Число одновременных запросов (по умолчанию {HTTP_POOL_SIZE})")
+    args = parser.parse_args()
+
+    if args.concurrency < 1:
+        parser.error("--concurrency должен быть положительным числом")
+
+    input_file = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    output_file = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        total, failed = asyncio.run(run(input_file, output_file, args.concurrency))
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+    print(f"Готово. Адресов: {total}, с ошибками: {failed}.", file=sys.stderr)
@@ -0,0 +1,305 @@
+import argparse
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qsl
+
+from utils import api_client
+from utils.config import (
+    GEOCODER_API_SERVER, GEOSEARCH_API_SERVER,
+    SERVICE_HOST, SERVICE_PORT, SERVICE_WORKERS, SERVICE_CACHE_TTL, SERVICE_CACHE_MAX_ENTRIES
+)
+from utils.geo_utils import haversine_distance
+from utils.geocoder import complete_address, fetch_geocoder_json, first_geo_object
+from utils.geosearch import fetch_organizations
+from utils.log import get_logger
+from utils.metrics import metrics
+from tasks.task_04_find_district import local_district_index
+
+logger = get_logger("service")
+
+MAX_HEADER_BYTES = 16 * 1024
+IDLE_TIMEOUT = 30  # Seconds a keep-alive connection may stay silent
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           431: "Request Header Fields Too Large", 500: "Internal Server Error", 502: "Bad Gateway"}
+
+
+class ServiceError(Exception):
+    """An error answered with an HTTP status and a JSON {"error": message} body."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class TtlCache:
+    """Small in-process LRU cache with a per-entry time to live."""
+
+    def __init__(self, ttl_seconds, max_entries):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+# --- Blocking endpoint logic (runs in worker threads) ---
+
+def _coords_param(params):
+    """Returns (lon, lat) from "lon"/"lat" params, or None if they are not given."""
+    if "lon" not in params and "lat" not in params:
+        return None
+    try:
+        return float(params["lon"]), float(params["lat"])
+    except (KeyError, ValueError):
+        raise ServiceError(400, "lon и lat должны быть числами")
+
+
+def _geocode(address):
+    toponym = first_geo_object(fetch_geocoder_json(address))
+    if toponym is None:
+        raise ServiceError(404, f"адрес '{address}' не найден")
+    return toponym
+
+
+def _start_point(params):
+    coords = _coords_param(params)
+    if coords is not None:
+        return coords
+    if not params.get("address"):
+        raise ServiceError(400, "нужен параметр address или lon и lat")
+    return _geocode(params["address"]).coords
+
+
+def geocode(params):
+    """GET /geocode?address=... - like task_02 geocode_address, plus the found object."""
+    if not params.get("address"):
+        raise ServiceError(400, "нужен параметр address")
+    toponym = _geocode(params["address"])
+    return {"query": params["address"], "lon": toponym.lon, "lat": toponym.lat,
+            "name": toponym.name, "address": toponym.address, "kind": toponym.kind}
+
+
+def nearest_organization(params):
+    """
+    GET /nearest-pharmacy?address=...|lon=..&lat=..[&text=аптека] - like task_02
+    find_nearest_organization plus haversine_distance.
+    """
+    start = _start_point(params)
+    text = params.get("text") or "аптека"
+    organizations, _ = fetch_organizations(start, text, 1)
+    if not organizations:
+        raise ServiceError(404, f"организации '{text}' рядом не найдены")
+    organization = organizations[0]
+    return {
+        "start": {"lon": start[0], "lat": start[1]},
+        "organization": {"name": organization.name, "address": organization.address,
+                         "hours": organization.hours_text,
+                         "lon": organization.lon, "lat": organization.lat},
+        "distance_m": round(haversine_distance(start, organization.coords) * 1000, 1),
+    }
+
+
+def district(params):
+    """
+    GET /district?address=...|lon=..&lat=..[&kind=district] - like task_04
+    get_object_by_address / get_object_by_coords: local district boundaries,
+    then the components of the geocoded address, then reverse geocoding.
+    """
+    kind = params.get("kind") or "district"
+    toponym = None
+    start = _coords_param(params)
+    if start is None:
+        if not params.get("address"):
+            raise ServiceError(400, "нужен параметр address или lon и lat")
+        toponym = _geocode(params["address"])
+        start = toponym.coords
+
+    result = {"lon": start[0], "lat": start[1], "kind": kind}
+    if kind == "district":
+        district_index = local_district_index()
+        name = district_index.lookup(start) if district_index is not None else None
+        if name:
+            return {**result, "name": name, "source": "local"}
+    if toponym is not None and toponym.component(kind):
+        return {**result, "name": toponym.component(kind), "source": "address"}
+
+    geo_object = first_geo_object(fetch_geocoder_json(f"{start[0]},{start[1]}", kind=kind, results=1))
+    if geo_object is None or not geo_object.name:
+        raise ServiceError(404, f"объект типа '{kind}' по координатам не найден")
+    return {**result, "name": geo_object.name, "source": "geocoder"}
+
+
+def complete(params):
+    """GET /complete?q=...[&limit=10] - addresses geocoded earlier that match a typed prefix (no API call)."""
+    try:
+        limit = int(params.get("limit") or 10)
+    except ValueError:
+        raise ServiceError(400, "limit должен быть целым числом")
+    return [{"address": address, "lon": lon, "lat": lat}
+            for address, lon, lat in complete_address(params.get("q", ""), limit)]
+
+
+ROUTES = {
+    "/geocode": geocode,
+    "/nearest-pharmacy": nearest_organization,
+    "/district": district,
+    "/complete": complete,
+}
+# Answered from local state that grows while the service runs: never cached
+UNCACHED_ROUTES = {"/complete"}
+
+
+class MapsService:
+    """
+    Resident HTTP/1.1 JSON service on one asyncio event loop.
+
+    Blocking API calls run in a shared thread pool whose size matches the
+    pooled connections per API server; results are kept in an in-process TTL
+    cache, and identical concurrent requests are computed once.
+    """
+
+    def __init__(self, workers=SERVICE_WORKERS, cache_ttl=SERVICE_CACHE_TTL,
+                 cache_max_entries=SERVICE_CACHE_MAX_ENTRIES):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="service")
+        self.cache = TtlCache(cache_ttl, cache_max_entries)
+        self._in_flight = {}  # cache key -> asyncio.Future
+        for server_url in (GEOCODER_API_SERVER, GEOSEARCH_API_SERVER):
+            api_client.get_session(server_url, pool_size=workers)
+
+    async def call(self, path, params):
+        """Runs an endpoint (cached, coalesced) and returns its JSON-serializable result."""
+        handler = ROUTES.get(path)
+        if handler is None:
+            raise ServiceError(404, f"нет такого метода: {path}")
+        if path in UNCACHED_ROUTES:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, handler, params)
+
+        key = (path, tuple(sorted((name, " ".join(value.lower().split())) for name, value in params.items())))
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            return await asyncio.shield(in_flight)
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, handler, params)
+        self._in_flight[key] = future
+        try:
+            result = await asyncio.shield(future)
+        finally:
+            del self._in_flight[key]
+        self.cache.set(key, result)
+        return result
+
+    async def respond(self, method, target):
+        """Returns (status, content type, body bytes) for one request."""
+        url = urlsplit(target)
+        if url.path == "/health":
+            return 200, "application/json", b'{"status": "ok"}'
+        if url.path == "/metrics":
+            return 200, "text/plain; version=0.0.4; charset=utf-8", metrics.prometheus_text().encode("utf-8")
+
+        try:
+            if method != "GET":
+                raise ServiceError(405, "поддерживается только GET")
+            result = await self.call(url.path, dict(parse_qsl(url.query)))
+            status = 200
+        except ServiceError as e:
+            status, result = e.status, {"error": str(e)}
+        except api_client.RequestException as e:
+            status, result = 502, {"error": f"ошибка запроса к API: {e}"}
+        except Exception as e:
+            logger.exception("Необработанная ошибка сервиса", extra={"fields": {"path": url.path}})
+            status, result = 500, {"error": str(e)}
+        return status, "application/json", json.dumps(result, ensure_ascii=False).encode("utf-8")
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), IDLE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await self._write(writer, 431, "application/json", b'{"error": "headers too large"}', False)
+                    return
+
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = request_line.split(" ")
+                except ValueError:
+                    await self._write(writer, 400, "application/json", b'{"error": "bad request line"}', False)
+                    return
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if headers.get("content-length", "0") != "0":
+                    await reader.readexactly(int(headers["content-length"]))  # Bodies are not used
+
+                keep_alive = (version == "HTTP/1.1" and headers.get("connection", "").lower() != "close") or \
+                    headers.get("connection", "").lower() == "keep-alive"
+                status, content_type, body = await self.respond(method, target)
+                await self._write(writer, status, content_type, body, keep_alive)
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _write(writer, status, content_type, body, keep_alive):
+        if "charset" not in content_type:
+            content_type += "; charset=utf-8"
+        head = (
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        addresses = ", ".join(f"{sock.getsockname()[0]}:{sock.getsockname()[1]}" for sock in server.sockets)
+        logger.info(f"Сервис слушает {addresses}")
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="HTTP-сервис: геокодирование, ближайшая организация и район (JSON)."
+    )
+    parser.add_argument("--host", default=SERVICE_HOST, help=f"Адрес (по умолчанию {SERVICE_HOST})")
+    parser.add_argument("--port", type=int, default=SERVICE_PORT, help=f"Порт (по умолчанию {SERVICE_PORT})")
+    parser.add_argument("--workers", type=int, default=SERVICE_WORKERS,
+                        help=f"Потоков для запросов к API (по умолчанию {SERVICE_WORKERS})")
+    args = parser.parse_args()
+
+    service = MapsService(workers=args.workers)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.executor.shutdown(wait=False, cancel_futures=True)
+        api_client.close_sessions()
@@ -1,45 +1,36 @@
 import sys
-from io import BytesIO
-import requests
-from PIL import Image
 
+from utils import api_client
 from utils.map_utils import get_map_params
-from utils.config import (
-    GEOCODER_API_KEY, STATIC_MAPS_API_KEY,
-    GEOCODER_API_SERVER, STATIC_MAPS_API_SERVER
-)
+from utils.geocoder import fetch_geocoder_json, first_geo_object
+from utils.static_maps import get_static_map_bytes
+from utils.config import STATIC_MAPS_API_KEY, MAP_TILES
+from utils.log import get_logger
+
+logger = get_logger("task_01")
 
 
 def geocode_address(address_to_find):
-    geocoder_params = {
-        "apikey": GEOCODER_API_KEY,  # Используем импортированный ключ
-        "geocode": address_to_find,
-        "format": "json"
-    }
-    print(f"Ищем адрес: '{address_to_find}'...")
+    logger.info(f"Ищем адрес: '{address_to_find}'...")
     try:
-        # Используем импортированный URL
-        response = requests.get(GEOCODER_API_SERVER, params=geocoder_params)
-        response.raise_for_status()
-        json_response = response.json()
-
-        feature_member = json_response["response"]["GeoObjectCollection"]["featureMember"]
-        if not feature_member:
-            print(f"Ошибка: Адрес '{address_to_find}' не найден.")
+        json_response = fetch_geocoder_json(address_to_find)
+
+        toponym = first_geo_object(json_response)
+        if toponym is None:
+            logger.error(f"Ошибка: Адрес '{address_to_find}' не найден.")
             return None
 
-        toponym = feature_member[0]["GeoObject"]
-        print("Адрес найден.")
+        logger.info("Адрес найден.")
         return toponym
 
-    except requests.exceptions.RequestException as e:
-        print(f"Ошибка сети при запросе к Геокодеру: {e}")
+    except api_client.RequestException as e:
+        logger.error(f"Ошибка сети при запросе к Геокодеру: {e}")
         return None
-    except (KeyError, IndexError):
-        print("Ошибка: Некорректный формат ответа от Геокодера.")
+    except (KeyError, IndexError, ValueError):
+        logger.error("Ошибка: Некорректный формат ответа от Геокодера.")
         return None
     except Exception as e:
-        print(f"Непредвиденная ошибка при геокодировании: {e}")
+        logger.error(f"Непредвиденная ошибка при геокодировании: {e}")
         return None
 
 
@@ -52,23 +43,50 @@ def get_static_map_image(map_params_dict, point_coords):
     }
     static_api_params.update(map_params_dict)
 
-    print("Запрос карты из Static API...")
+    if MAP_TILES:
+        return get_tiled_map_image(map_params_dict, point_coords)
+
+    logger.info("Запрос карты из Static API...")
     try:
-        # Используем импортированный URL
-        response = requests.get(STATIC_MAPS_API_SERVER, params=static_api_params)
-        print(f"URL запроса: {response.url}")
-        response.raise_for_status()
+        from io import BytesIO
+        from PIL import Image  # Only the map path needs Pillow
 
-        image_stream = BytesIO(response.content)
+        image_stream = BytesIO(get_static_map_bytes(static_api_params))
         opened_image = Image.open(image_stream)
-        print("Карта получена.")
+        logger.info("Карта получена.")
+        return opened_image
+
+    except api_client.RequestException as e:
+        logger.error(f"Ошибка сети при запросе к StaticMapsAPI: {e}")
+        return None
+    except Exception as e:
+        logger.error(f"Непредвиденная ошибка при получении карты: {e}")
+        return None
+
+
+def get_tiled_map_image(map_params_dict, point_coords):
+    """
+    Same view as get_static_map_image, assembled from cached grid tiles at
+    the nearest zoom level (utils/tiles.py), with the marker drawn locally.
+    """
+    logger.info("Сборка карты из тайлов Static API...")
+    try:
+        from utils.map_render import draw_markers
+        from utils.tiles import render_tiled_view, zoom_for_span
+
+        center = tuple(map(float, map_params_dict["ll"].split(",")))
+        spn = tuple(map(float, map_params_dict["spn"].split(",")))
+        zoom = zoom_for_span(center, spn)
+        opened_image = render_tiled_view(center, zoom)
+        draw_markers(opened_image, [(point_coords[0], point_coords[1], "pm2rdl")], center, zoom)
+        logger.info("Карта получена.")
         return opened_image
 
-    except requests.exceptions.RequestException as e:
-        print(f"Ошибка сети при запросе к StaticMapsAPI: {e}")
+    except api_client.RequestException as e:
+        logger.error(f"Ошибка сети при запросе к StaticMapsAPI: {e}")
         return None
     except Exception as e:
-        print(f"Непредвиденная ошибка при получении карты: {e}")
+        logger.error(f"Непредвиденная ошибка при получении карты: {e}")
         return None
 
 
@@ -84,15 +102,7 @@ if __name__ == "__main__":
     if found_toponym:
         map_params = get_map_params(found_toponym)
         if map_params:
-            try:
-                toponym_point_str = found_toponym["Point"]["pos"]
-                toponym_longitude, toponym_lattitude = map(float, toponym_point_str.split(" "))
-                point_coords_for_marker = (toponym_longitude, toponym_lattitude)
-            except (KeyError, IndexError, ValueError):
-                print("Ошибка: Не удалось получить точные координаты для метки из объекта.")
-                sys.exit(1)
-
-            map_image = get_static_map_image(map_params, point_coords_for_marker)
+            map_image = get_static_map_image(map_params, found_toponym.coords)
 
             if map_image:
                 print("Показ карты...")
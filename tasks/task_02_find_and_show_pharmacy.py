@@ -1,13 +1,12 @@
 import sys
-from io import BytesIO
-import requests
-from PIL import Image
-
-from utils.config import (
-    GEOCODER_API_KEY, STATIC_MAPS_API_KEY, GEOSEARCH_API_KEY,
-    GEOCODER_API_SERVER, STATIC_MAPS_API_SERVER, GEOSEARCH_API_SERVER
-)
+
+from utils import api_client
+from utils.geocoder import fetch_geocoder_json, first_geo_object
+from utils.geosearch import fetch_organizations
 from utils.geo_utils import haversine_distance
+from utils.log import get_logger
+
+logger = get_logger("task_02")
 
 
 def geocode_address(address_to_find):
@@ -15,90 +14,59 @@ def geocode_address(address_to_find):
     Gets coordinates (lon, lat) for a given address using Yandex Geocoder.
     Returns tuple (float, float) or None on error.
     """
-    geocoder_params = {
-        "apikey": GEOCODER_API_KEY,
-        "geocode": address_to_find,
-        "format": "json"
-    }
-    print(f"1. Ищем адрес: '{address_to_find}'...")
+    logger.info(f"1. Ищем адрес: '{address_to_find}'...")
     try:
-        response = requests.get(GEOCODER_API_SERVER, params=geocoder_params)
-        response.raise_for_status()
-        json_response = response.json()
+        json_response = fetch_geocoder_json(address_to_find)
 
-        feature_member = json_response["response"]["GeoObjectCollection"]["featureMember"]
-        if not feature_member:
-            print(f"   Ошибка: Адрес '{address_to_find}' не найден.")
+        toponym = first_geo_object(json_response)
+        if toponym is None:
+            logger.error(f"   Ошибка: Адрес '{address_to_find}' не найден.")
             return None
 
-        toponym = feature_member[0]["GeoObject"]
-        coords_str = toponym["Point"]["pos"]
-        longitude, latitude = map(float, coords_str.split())
-        print(f"   Координаты найдены: ({longitude:.6f}, {latitude:.6f})")
+        longitude, latitude = toponym.coords
+        logger.info(f"   Координаты найдены: ({longitude:.6f}, {latitude:.6f})")
         return (longitude, latitude)
 
-    except requests.exceptions.RequestException as e:
-        print(f"   Ошибка сети при запросе к Геокодеру: {e}")
+    except api_client.RequestException as e:
+        logger.error(f"   Ошибка сети при запросе к Геокодеру: {e}")
         return None
     except Exception as e:
-        print(f"   Непредвиденная ошибка при геокодировании: {e}")
+        logger.error(f"   Непредвиденная ошибка при геокодировании: {e}")
         return None
 
 
 def find_nearest_organization(coords_lonlat, text_query, org_type="biz"):
     """
     Finds the nearest organization matching the query near given coordinates.
-    Returns a dictionary with organization details or None on error.
+    Returns an Organization record (utils/records.py) or None on error.
     """
-    search_params = {
-        "apikey": GEOSEARCH_API_KEY,
-        "text": text_query,
-        "lang": "ru_RU",
-        "ll": f"{coords_lonlat[0]},{coords_lonlat[1]}",
-        "type": org_type,
-        "results": 1  # We only need the nearest one
-    }
-    print(f"2. Ищем ближайший объект '{text_query}'...")
+    logger.info(f"2. Ищем ближайший объект '{text_query}'...")
     try:
-        response = requests.get(GEOSEARCH_API_SERVER, params=search_params)
-        response.raise_for_status()
-        json_response = response.json()
+        # We only need the nearest one
+        organizations, from_index = fetch_organizations(coords_lonlat, text_query, 1, org_type)
+        if from_index:
+            logger.info("   (ответ из локального индекса организаций)")
 
-        if not json_response.get("features"):
-            print(f"   Ошибка: Организации типа '{text_query}' не найдены рядом.")
+        if not organizations:
+            logger.error(f"   Ошибка: Организации типа '{text_query}' не найдены рядом.")
             return None
 
-        organization = json_response["features"][0]
-        org_meta = organization["properties"].get("CompanyMetaData", {})
-        org_name = org_meta.get("name", "Название не найдено")
-        org_address = org_meta.get("address", "Адрес не найден")
-        org_hours_info = org_meta.get("Hours", {})
-        # Try to get text representation, otherwise state it's unavailable
-        org_hours = org_hours_info.get("text",
-                                       "Нет данных о часах работы") if org_hours_info else "Нет данных о часах работы"
-
-        point = organization["geometry"]["coordinates"]
-        org_lon, org_lat = float(point[0]), float(point[1])
-
-        print(f"   Найдена организация: {org_name}")
-        return {
-            "name": org_name,
-            "address": org_address,
-            "hours": org_hours,
-            "coords": (org_lon, org_lat)
-        }
-
-    except requests.exceptions.RequestException as e:
-        print(f"   Ошибка сети при запросе к Geosearch API: {e}")
+        organization = organizations[0]
+        logger.info(f"   Найдена организация: {organization.name or 'Название не найдено'}")
+        return organization
+
+    except api_client.RequestException as e:
+        logger.error(f"   Ошибка сети при запросе к Geosearch API: {e}")
         return None
     except Exception as e:
-        print(f"   Непредвиденная ошибка при поиске организации: {e}")
+        logger.error(f"   Непредвиденная ошибка при поиске организации: {e}")
         return None
 
 
 def get_static_map_with_points(points_data):
     """
     Gets a map image from StaticMapsAPI centered to fit all points.
+    Any number of points can be passed: large sets are clustered (utils/map_render.py).
     Args:
         points_data (list): A list of tuples, where each tuple is
                            (longitude, latitude, style_marker)
@@ -109,34 +77,18 @@ def get_static_map_with_points(points_data):
     if not points_data:
         return None
 
-    # Construct the 'pt' parameters string
-    pt_params = []
-    for lon, lat, style in points_data:
-        pt_params.append(f"{lon:.6f},{lat:.6f},{style}")
-
-    static_api_params = {
-        "l": "map",
-        "apikey": STATIC_MAPS_API_KEY,
-        "pt": "~".join(pt_params)  # Use ~ as separator for multiple points
-        # No ll or spn needed - API will auto-adjust
-    }
-
-    print("4. Запрос карты из Static API с метками...")
+    logger.info("4. Запрос карты из Static API с метками...")
     try:
-        response = requests.get(STATIC_MAPS_API_SERVER, params=static_api_params)
-        # print(f"   URL запроса: {response.url}") # Uncomment for debugging
-        response.raise_for_status()
-
-        image_stream = BytesIO(response.content)
-        opened_image = Image.open(image_stream)
-        print("   Карта получена.")
+        from utils.map_render import render_points_map  # Pillow/NumPy load only when a map is drawn
+        opened_image = render_points_map(points_data)
+        logger.info("   Карта получена.")
         return opened_image
 
-    except requests.exceptions.RequestException as e:
-        print(f"   Ошибка сети при запросе к StaticMapsAPI: {e}")
+    except api_client.RequestException as e:
+        logger.error(f"   Ошибка сети при запросе к StaticMapsAPI: {e}")
         return None
     except Exception as e:
-        print(f"   Непредвиденная ошибка при получении карты: {e}")
+        logger.error(f"   Непредвиденная ошибка при получении карты: {e}")
         return None
 
 
@@ -160,33 +112,33 @@ if __name__ == "__main__":
         sys.exit(1)
 
     # 3. Calculate distance
-    print("3. Расчет расстояния...")
-    distance_km = haversine_distance(start_coords, pharmacy_info["coords"])
+    logger.info("3. Расчет расстояния...")
+    distance_km = haversine_distance(start_coords, pharmacy_info.coords)
     distance_m = distance_km * 1000
-    print(f"   Расстояние: {distance_m:.1f} м (~{distance_km:.2f} км)")
+    logger.info(f"   Расстояние: {distance_m:.1f} м (~{distance_km:.2f} км)")
 
     # 4. Prepare points for the map
     # Point 1: Start address (blue marker)
     # Point 2: Pharmacy (red marker)
     map_points = [
         (start_coords[0], start_coords[1], "pm2blm"),  # blue
-        (pharmacy_info["coords"][0], pharmacy_info["coords"][1], "pm2rdm")  # red
+        (pharmacy_info.lon, pharmacy_info.lat, "pm2rdm")  # red
     ]
 
     # 5. Get and show the map
     map_image = get_static_map_with_points(map_points)
     if map_image:
-        print("5. Показ карты...")
+        logger.info("5. Показ карты...")
         map_image.show()
     else:
-        print("   Не удалось получить изображение карты.")
+        logger.warning("   Не удалось получить изображение карты.")
 
     # 6. Print the snippet
     print("\n" + "-" * 40)
     print("Информация о ближайшей аптеке:")
-    print(f"  Название:  {pharmacy_info['name']}")
-    print(f"  Адрес:     {pharmacy_info['address']}")
-    print(f"  Часы работы: {pharmacy_info['hours']}")
+    print(f"  Название:  {pharmacy_info.name or 'Название не найдено'}")
+    print(f"  Адрес:     {pharmacy_info.address or 'Адрес не найден'}")
+    print(f"  Часы работы: {pharmacy_info.hours_text or 'Нет данных о часах работы'}")
     print(f"  Расстояние: {distance_m:.1f} м")
     print("-" * 40)
 
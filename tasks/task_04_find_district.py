@@ -1,50 +1,76 @@
 import sys
-import requests
 
-from utils.config import (
-    GEOCODER_API_KEY, GEOCODER_API_SERVER
-)
+from utils import api_client
+from utils.geocoder import fetch_geocoder_json, first_geo_object
+from utils.config import DISTRICTS_GEOJSON_PATH
+from utils.log import get_logger
 
+logger = get_logger("task_04")
 
-def get_coords_from_address(address_to_find):
+
+def geocode_toponym(address_to_find):
     """
-    Gets coordinates (lon, lat) for a given address using Yandex Geocoder.
-    Returns tuple (float, float) or None on error.
+    Geocodes the address using Yandex Geocoder.
+    Returns the most relevant GeoObject record or None on error.
     """
-    geocoder_params = {
-        "apikey": GEOCODER_API_KEY,
-        "geocode": address_to_find,
-        "format": "json"
-    }
-    print(f"1. Ищем координаты адреса: '{address_to_find}'...")
+    logger.info(f"1. Ищем координаты адреса: '{address_to_find}'...")
     try:
-        response = requests.get(GEOCODER_API_SERVER, params=geocoder_params)
-        response.raise_for_status()
-        json_response = response.json()
+        json_response = fetch_geocoder_json(address_to_find)
 
-        feature_member = json_response["response"]["GeoObjectCollection"]["featureMember"]
-        if not feature_member:
-            print(f"   Ошибка: Адрес '{address_to_find}' не найден.")
+        toponym = first_geo_object(json_response)
+        if toponym is None:
+            logger.error(f"   Ошибка: Адрес '{address_to_find}' не найден.")
             return None
 
-        toponym = feature_member[0]["GeoObject"]
-        coords_str = toponym["Point"]["pos"]
-        longitude, latitude = map(float, coords_str.split())
-        print(f"   Координаты найдены: ({longitude:.6f}, {latitude:.6f})")
-        return (longitude, latitude)
+        logger.info(f"   Координаты найдены: ({toponym.lon:.6f}, {toponym.lat:.6f})")
+        return toponym
 
-    except requests.exceptions.RequestException as e:
-        print(f"   Ошибка сети при запросе к Геокодеру: {e}")
+    except api_client.RequestException as e:
+        logger.error(f"   Ошибка сети при запросе к Геокодеру: {e}")
         return None
     except Exception as e:
-        print(f"   Непредвиденная ошибка при геокодировании адреса: {e}")
+        logger.error(f"   Непредвиденная ошибка при геокодировании адреса: {e}")
+        return None
+
+
+def get_coords_from_address(address_to_find):
+    """
+    Gets coordinates (lon, lat) for a given address using Yandex Geocoder.
+    Returns tuple (float, float) or None on error.
+    """
+    toponym = geocode_toponym(address_to_find)
+    return toponym.coords if toponym is not None else None
+
+
+def local_district_index():
+    """
+    The offline district index, or None if no boundaries file is configured
+    or it can't be loaded. Imported only when configured: it loads NumPy.
+    """
+    if not DISTRICTS_GEOJSON_PATH:
         return None
+    from utils.district_index import get_district_index
+    return get_district_index()
+
+
+def local_district_name(coords_lonlat):
+    """The district from the local boundaries, or None if they aren't configured or miss the point."""
+    district_index = local_district_index()
+    if district_index is None:
+        return None
+    object_name = district_index.lookup(coords_lonlat)
+    if object_name:
+        logger.info(f"   Найден объект (локальные границы районов): {object_name}")
+    else:
+        logger.info("   Точка вне локальных границ районов.")
+    return object_name
 
 
 def get_object_by_coords(coords_lonlat, kind):
     """
     Finds the name of the geographical object of a specific 'kind'
-    at the given coordinates using reverse geocoding.
+    at the given coordinates: in the local district boundaries (for
+    districts), then by reverse geocoding.
 
     Args:
         coords_lonlat (tuple): (longitude, latitude) tuple.
@@ -53,45 +79,118 @@ def get_object_by_coords(coords_lonlat, kind):
     Returns:
         str: The name of the found object or None on error.
     """
-    reverse_geocoder_params = {
-        "apikey": GEOCODER_API_KEY,
-        "geocode": f"{coords_lonlat[0]},{coords_lonlat[1]}",  # Reverse geocode format
-        "format": "json",
-        "kind": kind,
-        "results": 1  # We only need the most relevant object of this kind
-    }
-    print(f"2. Ищем объект типа '{kind}' по координатам {coords_lonlat}...")
-    try:
-        response = requests.get(GEOCODER_API_SERVER, params=reverse_geocoder_params)
-        response.raise_for_status()
-        json_response = response.json()
+    logger.info(f"2. Ищем объект типа '{kind}' по координатам {coords_lonlat}...")
+    if kind == "district":
+        object_name = local_district_name(coords_lonlat)
+        if object_name:
+            return object_name
+    return reverse_geocode_object(coords_lonlat, kind)
+
 
-        feature_member = json_response["response"]["GeoObjectCollection"]["featureMember"]
-        if not feature_member:
-            print(f"   Ошибка: Объект типа '{kind}' не найден по данным координатам.")
+def reverse_geocode_object(coords_lonlat, kind):
+    """
+    Finds the name of the geographical object of a specific 'kind'
+    at the given coordinates using reverse geocoding only.
+
+    Args:
+        coords_lonlat (tuple): (longitude, latitude) tuple.
+        kind (str): The kind of object to search for (e.g., 'district').
+
+    Returns:
+        str: The name of the found object or None on error.
+    """
+    try:
+        json_response = fetch_geocoder_json(
+            f"{coords_lonlat[0]},{coords_lonlat[1]}",  # Reverse geocode format
+            kind=kind,
+            results=1  # We only need the most relevant object of this kind
+        )
+
+        geo_object = first_geo_object(json_response)
+        if geo_object is None:
+            logger.error(f"   Ошибка: Объект типа '{kind}' не найден по данным координатам.")
             return None
 
         # For kinds like 'district', the name is usually in the 'name' field
         # or sometimes more detailed in metaDataProperty.GeocoderMetaData.text
-        geo_object = feature_member[0]["GeoObject"]
-        object_name = geo_object.get("name")
+        object_name = geo_object.name
         # Fallback or alternative:
-        # object_name = geo_object.get("metaDataProperty", {}).get("GeocoderMetaData", {}).get("text")
+        # object_name = geo_object.address
 
         if object_name:
-            print(f"   Найден объект: {object_name}")
+            logger.info(f"   Найден объект: {object_name}")
             return object_name
         else:
-            print(f"   Ошибка: Не удалось извлечь имя объекта типа '{kind}' из ответа API.")
+            logger.error(f"   Ошибка: Не удалось извлечь имя объекта типа '{kind}' из ответа API.")
             return None
 
-    except requests.exceptions.RequestException as e:
-        print(f"   Ошибка сети при обратном геокодировании: {e}")
+    except api_client.RequestException as e:
+        logger.error(f"   Ошибка сети при обратном геокодировании: {e}")
         return None
     except Exception as e:
-        print(f"   Непредвиденная ошибка при обратном геокодировании: {e}")
+        logger.error(f"   Непредвиденная ошибка при обратном геокодировании: {e}")
+        return None
+
+
+def get_object_by_address(address_to_find, kind):
+    """
+    Finds the name of the geographical object of a specific 'kind' that
+    the address belongs to, in one Geocoder request when possible.
+
+    The forward geocoding response lists the address hierarchy
+    (metaDataProperty.GeocoderMetaData.Address.Components), which usually
+    already contains the district, locality and province. Reverse
+    geocoding is requested only if the kind is not among them (e.g. metro).
+
+    Args:
+        address_to_find (str): The address.
+        kind (str): The kind of object to search for (e.g., 'district').
+
+    Returns:
+        str: The name of the found object or None on error.
+    """
+    toponym = geocode_toponym(address_to_find)
+    if toponym is None:
         return None
 
+    if kind == "district":
+        object_name = local_district_name(toponym.coords)
+        if object_name:
+            return object_name
+
+    object_name = toponym.component(kind)
+    if object_name:
+        logger.info(f"2. Найден объект типа '{kind}' в компонентах адреса: {object_name}")
+        return object_name
+    logger.info(f"2. Ищем объект типа '{kind}' по координатам {toponym.coords}...")
+    return reverse_geocode_object(toponym.coords, kind)
+
+
+def get_districts_by_coords(coords_list):
+    """
+    Finds districts for many points at once.
+
+    Points are classified in one vectorized pass over the local district
+    boundaries (if configured); only points no polygon covers go to
+    reverse geocoding.
+
+    Args:
+        coords_list (list): (longitude, latitude) tuples.
+
+    Returns:
+        list: District names (None where the district couldn't be found).
+    """
+    district_index = local_district_index()
+    if district_index is not None:
+        names = district_index.lookup_many(coords_list)
+    else:
+        names = [None] * len(coords_list)
+
+    for i, name in enumerate(names):
+        if name is None:
+            names[i] = reverse_geocode_object(coords_list[i], "district")
+    return names
+
 
 if __name__ == "__main__":
     if len(sys.argv) <= 1:
@@ -103,13 +202,9 @@ if __name__ == "__main__":
     # Get address from command line
     address_input = " ".join(sys.argv[1:])
 
-    # 1. Get coordinates for the input address
-    coordinates = get_coords_from_address(address_input)
-    if coordinates is None:
-        sys.exit(1)
-
-    # 2. Use coordinates to find the district
-    district_name = get_object_by_coords(coordinates, "district")
+    # Geocode the address; its components usually name the district already,
+    # otherwise the coordinates are reverse geocoded
+    district_name = get_object_by_address(address_input, "district")
 
     # 3. Print the result
     print("-" * 40)
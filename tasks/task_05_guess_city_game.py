@@ -1,13 +1,26 @@
+import argparse
+import os
 import sys
-import requests
-import pygame
 import random
 import io
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from utils.config import (
-    GEOCODER_API_KEY, STATIC_MAPS_API_KEY,
-    GEOCODER_API_SERVER, STATIC_MAPS_API_SERVER
-)
+from utils import api_client
+from utils.geocoder import fetch_geocoder_json, first_geo_object
+from utils.static_maps import get_static_map_bytes
+from utils.config import STATIC_MAPS_API_KEY, MAP_TILES, SLIDE_PACK_PATH, SLIDE_PACK_VIEWS
+from utils.lazy import lazy_import
+from utils.log import get_logger
+from utils.slide_pack import SlidePack, SlidePackError, write_slide_pack
+
+logger = get_logger("task_05")
+
+# Loaded when the game window opens / the first image is decoded
+pygame = lazy_import("pygame")
+Image = lazy_import("PIL.Image")
 
 CITIES = [
     "Москва", "Санкт-Петербург", "Новосибирск", "Екатеринбург", "Казань",
@@ -26,38 +39,32 @@ ANCHOR_POINT_OFFSET_FACTOR = 0.15  # Смещаемся максимум на 15
 MIN_SPN_VALUE = 0.005  # Минимальный spn
 MAX_SPN_VALUE = 0.25  # Максимальный spn (позволит видеть больше)
 
+SLIDE_WORKERS = 8  # Сколько слайдов готовится одновременно
+DECODE_AHEAD = 3  # Сколько следующих слайдов декодируется заранее
+SURFACE_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Лимит памяти готовых Surface
+
 
 def geocode_city(city_name):
-    geocoder_params = {
-        "apikey": GEOCODER_API_KEY,
-        "geocode": city_name,
-        "format": "json",
-        "kind": "locality",
-        "results": 1
-    }
-    print(f"Геокодирование города: '{city_name}'...")
+    logger.info(f"Геокодирование города: '{city_name}'...")
     try:
-        response = requests.get(GEOCODER_API_SERVER, params=geocoder_params)
-        response.raise_for_status()
-        json_response = response.json()
-        feature_member = json_response["response"]["GeoObjectCollection"]["featureMember"]
-        if not feature_member:
-            print(f"   Ошибка: Город '{city_name}' не найден.")
+        json_response = fetch_geocoder_json(city_name, kind="locality", results=1)
+        geo_object = first_geo_object(json_response)
+        if geo_object is None:
+            logger.error(f"   Ошибка: Город '{city_name}' не найден.")
             return None
-        geo_object = feature_member[0]["GeoObject"]
-        print(f"   Город '{city_name}' найден.")
+        logger.info(f"   Город '{city_name}' найден.")
         return geo_object
-    except requests.exceptions.RequestException as e:
-        print(f"   Ошибка сети при запросе к Геокодеру: {e}")
+    except api_client.RequestException as e:
+        logger.error(f"   Ошибка сети при запросе к Геокодеру: {e}")
         return None
     except Exception as e:
-        print(f"   Непредвиденная ошибка при геокодировании: {e}")
+        logger.error(f"   Непредвиденная ошибка при геокодировании: {e}")
         return None
 
 
 def get_zoomed_map_image(geo_object):
     """
-    Gets a randomly zoomed and offset map image (bytes) for a city GeoObject,
+    Gets a randomly zoomed and offset map image (bytes) for a city GeoObject record,
     attempting to hide the city name. Uses the basic map view.
     Leverages city boundaries to scale the random zoom and offset.
     Returns image bytes or None on error.
@@ -66,14 +73,8 @@ def get_zoomed_map_image(geo_object):
         return None
 
     try:
-        envelope = geo_object["boundedBy"]["Envelope"]
-        lower_corner = envelope["lowerCorner"]
-        upper_corner = envelope["upperCorner"]
-        lc_lon, lc_lat = map(float, lower_corner.split(" "))
-        uc_lon, uc_lat = map(float, upper_corner.split(" "))
-
-        point = geo_object["Point"]["pos"]
-        center_lon, center_lat = map(float, point.split(" "))  # Needed for fallback if point object
+        lc_lon, lc_lat, uc_lon, uc_lat = geo_object.envelope
+        center_lon, center_lat = geo_object.coords  # Needed for fallback if point object
 
         delta_lon = abs(uc_lon - lc_lon)
         delta_lat = abs(uc_lat - lc_lat)
@@ -113,6 +114,20 @@ def get_zoomed_map_image(geo_object):
 
         map_type = "map"
 
+        if MAP_TILES:
+            from utils.tiles import render_tiled_view, zoom_for_span
+
+            # Quantized zoom + grid tiles: overlapping views share cached tiles
+            zoom = zoom_for_span((new_center_lon, new_center_lat), (spn_lon, spn_lat),
+                                 (SCREEN_WIDTH, SCREEN_HEIGHT))
+            logger.info(f"   Сборка карты из тайлов около точки {new_ll}, z={zoom}...")
+            image = render_tiled_view((new_center_lon, new_center_lat), zoom,
+                                      (SCREEN_WIDTH, SCREEN_HEIGHT), map_type)
+            buffer = io.BytesIO()
+            image.save(buffer, format="PNG", compress_level=1)
+            logger.info("   Карта получена.")
+            return buffer.getvalue()
+
         static_api_params = {
             "ll": new_ll,
             "spn": new_spn,
@@ -121,72 +136,299 @@ def get_zoomed_map_image(geo_object):
             "apikey": STATIC_MAPS_API_KEY
         }
 
-        print(
-            f"   Запрос карты Static API для '{geo_object.get('name', 'города')}' около точки {new_ll}, spn={new_spn}...")
-        response = requests.get(STATIC_MAPS_API_SERVER, params=static_api_params)
-        response.raise_for_status()
-        print("   Карта получена.")
-        return response.content
+        logger.info(
+            f"   Запрос карты Static API для '{geo_object.name or 'города'}' около точки {new_ll}, spn={new_spn}...")
+        image_bytes = get_static_map_bytes(static_api_params)
+        logger.info("   Карта получена.")
+        return image_bytes
 
-    except requests.exceptions.RequestException as e:
-        print(f"   Ошибка сети при запросе к StaticMapsAPI: {e}")
+    except api_client.RequestException as e:
+        logger.error(f"   Ошибка сети при запросе к StaticMapsAPI: {e}")
         return None
-    except (KeyError, IndexError, ValueError) as e:
-        print(f"   Ошибка при обработке гео-данных для карты: {e}")
+    except (TypeError, ValueError) as e:
+        logger.error(f"   Ошибка при обработке гео-данных для карты: {e}")
         return None
     except Exception as e:
-        print(f"   Непредвиденная ошибка при получении карты: {e}")
+        logger.error(f"   Непредвиденная ошибка при получении карты: {e}")
         return None
 
 
-if __name__ == "__main__":
-    print("Подготовка игры 'Угадай город'...")
+def prepare_slide(city, geo_obj=None):
+    """
+    Geocodes a city (unless its GeoObject record is given) and downloads its zoomed map.
+    Returns a slide dict {"name", "image_bytes"} or None on error.
+    """
+    geo_obj = geo_obj or geocode_city(city)
+    if not geo_obj:
+        logger.warning(f"   Не удалось геокодировать город: {city}")
+        return None
 
-    game_slides = []
-    for city in CITIES:
+    image_bytes = get_zoomed_map_image(geo_obj)
+    if not image_bytes:
+        logger.warning(f"   Не удалось получить карту для города: {city}")
+        return None
+
+    return {"name": city, "image_bytes": image_bytes}
+
+
+def start_slide_producer(cities, slide_queue, geo_objects=None):
+    """
+    Prepares slides for the cities in a background thread pool.
+
+    Each ready slide is put into ``slide_queue`` as soon as it is done
+    (in completion order); None is put after the last one. Cities found in
+    ``geo_objects`` (name -> GeoObject record) are not geocoded again.
+    """
+    geo_objects = geo_objects or {}
+
+    def produce():
+        with ThreadPoolExecutor(max_workers=SLIDE_WORKERS) as executor:
+            futures = [executor.submit(prepare_slide, city, geo_objects.get(city)) for city in cities]
+            for future in as_completed(futures):
+                slide = future.result()
+                if slide:
+                    slide_queue.put(slide)
+        slide_queue.put(None)
+
+    producer = threading.Thread(target=produce, name="slide-producer", daemon=True)
+    producer.start()
+    return producer
+
+
+def build_slide_pack(path, cities, views_per_city):
+    """
+    Geocodes the cities, downloads ``views_per_city`` random views of each
+    and writes them into a slide pack (utils/slide_pack.py) that the game
+    then starts from without any network requests.
+    Returns the number of cities written.
+    """
+    def city_views(city):
         geo_obj = geocode_city(city)
-        if geo_obj:
-            image_bytes = get_zoomed_map_image(geo_obj)
-            if image_bytes:
-                game_slides.append({
-                    "name": city,
-                    "image_bytes": image_bytes
-                })
-            else:
-                print(f"   Не удалось получить карту для города: {city}")
-        else:
-            print(f"   Не удалось геокодировать город: {city}")
+        if not geo_obj:
+            return None
+        images = [image for image in (get_zoomed_map_image(geo_obj) for _ in range(views_per_city)) if image]
+        return (city, geo_obj, images) if images else None
+
+    with ThreadPoolExecutor(max_workers=SLIDE_WORKERS) as executor:
+        packed = [entry for entry in executor.map(city_views, cities) if entry]
+    write_slide_pack(path, packed)
+    return len(packed)
+
+
+def open_slide_pack(path):
+    """Opens the slide pack, or returns None if there is none (or it is unreadable)."""
+    if not os.path.exists(path):
+        return None
+    try:
+        return SlidePack(path)
+    except (OSError, ValueError, SlidePackError) as e:
+        logger.warning(f"Набор слайдов {path} не прочитан: {e}")
+        return None
 
-    if not game_slides:
-        print("\nОшибка: Не удалось подготовить ни одного слайда для игры. Выход.")
-        sys.exit(1)
 
-    random.shuffle(game_slides)
-    print(f"\nПодготовлено слайдов: {len(game_slides)}. Начинаем игру!")
+def packed_slides(pack, cities):
+    """One randomly chosen stored view per city of the pack, in the order of ``cities``."""
+    positions = {name: i for i, name in enumerate(pack.city_names)}
+    slides = []
+    for city in cities:
+        i = positions.get(city)
+        if i is not None and pack.view_count(i):
+            slides.append({"name": city, "image_bytes": pack.image(i, random.randrange(pack.view_count(i)))})
+    return slides
+
+
+def decode_slide(image_bytes):
+    """
+    Decodes slide image bytes into raw RGB pixels (runs in a worker thread;
+    Pillow releases the GIL while decoding).
+    Returns ((width, height), pixel bytes).
+    """
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        rgb_image = image.convert("RGB")
+        return rgb_image.size, rgb_image.tobytes()
+
+
+class SurfaceCache:
+    """LRU cache of display-ready pygame Surfaces by slide index, capped by memory."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._surfaces = OrderedDict()
+
+    @staticmethod
+    def _size_of(surface):
+        return surface.get_bytesize() * surface.get_width() * surface.get_height()
+
+    def __contains__(self, index):
+        return index in self._surfaces
+
+    def get(self, index):
+        surface = self._surfaces.get(index)
+        if surface is not None:
+            self._surfaces.move_to_end(index)
+        return surface
+
+    def put(self, index, surface):
+        if index in self._surfaces:
+            self.total_bytes -= self._size_of(self._surfaces.pop(index))
+        self._surfaces[index] = surface
+        self.total_bytes += self._size_of(surface)
+        while self.total_bytes > self.max_bytes and len(self._surfaces) > 1:
+            _, evicted = self._surfaces.popitem(last=False)
+            self.total_bytes -= self._size_of(evicted)
+
+
+class SlideDecoder:
+    """
+    Decodes slides ahead of time in a worker thread and turns the decoded
+    pixels into Surfaces on the main thread (pygame display calls must stay
+    there). Converting a decoded buffer is a memory copy, so the main loop
+    never waits for PNG decoding.
+    """
+
+    def __init__(self, surface_cache):
+        self.cache = surface_cache
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slide-decoder")
+        self._pending = {}  # index -> Future of decode_slide
+        self.failed = set()
+
+    def prefetch(self, slides, indices):
+        """Starts decoding the given slides unless they are ready or in progress."""
+        for index in indices:
+            if index in self.cache or index in self._pending or index in self.failed:
+                continue
+            self._pending[index] = self._executor.submit(decode_slide, slides[index]["image_bytes"])
+
+    def _convert(self, index):
+        future = self._pending.pop(index)
+        try:
+            size, pixels = future.result()
+            surface = pygame.image.frombuffer(pixels, size, "RGB").convert()
+        except Exception as e:
+            logger.error(f"Ошибка загрузки изображения для слайда {index}: {e}")
+            self.failed.add(index)
+            return None
+        self.cache.put(index, surface)
+        return surface
+
+    def surface(self, index):
+        """Returns the Surface of a slide if it is ready (never blocks), else None."""
+        surface = self.cache.get(index)
+        if surface is None and index in self._pending and self._pending[index].done():
+            surface = self._convert(index)
+        return surface
+
+    def poll(self):
+        """Converts at most one finished decode per call (one per frame keeps frames even)."""
+        for index, future in list(self._pending.items()):
+            if future.done():
+                self._convert(index)
+                return
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Игра 'Угадай город'.")
+    parser.add_argument("--pack", default=SLIDE_PACK_PATH,
+                        help=f"Файл набора слайдов (по умолчанию {SLIDE_PACK_PATH})")
+    parser.add_argument("--build-pack", action="store_true",
+                        help="Подготовить набор слайдов для игры без сети и выйти")
+    parser.add_argument("--views", type=int, default=SLIDE_PACK_VIEWS,
+                        help=f"Видов каждого города в наборе (по умолчанию {SLIDE_PACK_VIEWS})")
+    parser.add_argument("--fresh-views", action="store_true",
+                        help="Запросить новые случайные виды по сохранённым в наборе границам городов")
+    args = parser.parse_args()
+
+    if args.build_pack:
+        print(f"Подготовка набора слайдов: {len(CITIES)} городов по {args.views} вида...")
+        written = build_slide_pack(args.pack, CITIES, args.views)
+        print(f"Набор слайдов записан: {args.pack} ({written} городов).")
+        sys.exit(0 if written else 1)
+
+    print("Подготовка игры 'Угадай город'...")
+
+    cities = list(CITIES)
+    random.shuffle(cities)
+    pack = open_slide_pack(args.pack)
+    game_slides = []
+    geo_objects = {}
+    if pack is not None and args.fresh_views:
+        geo_objects = {name: pack.geo_object(i) for i, name in enumerate(pack.city_names)}
+    elif pack is not None:
+        game_slides = packed_slides(pack, cities)
+    online_cities = [city for city in cities if city not in {slide["name"] for slide in game_slides}]
+
+    slide_queue = queue.Queue()
+    producer_done = not online_cities
+    if online_cities:
+        start_slide_producer(online_cities, slide_queue, geo_objects)
+
+    if game_slides:
+        print(f"\nСлайды взяты из набора {args.pack}: {len(game_slides)}. Начинаем игру!")
+    else:
+        # Open the window as soon as the first slide is ready; the rest keep loading
+        first_slide = slide_queue.get()
+        if first_slide is None:
+            print("\nОшибка: Не удалось подготовить ни одного слайда для игры. Выход.")
+            sys.exit(1)
+        game_slides.append(first_slide)
+        print("\nПервый слайд готов, остальные загружаются в фоне. Начинаем игру!")
 
     pygame.init()
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
     pygame.display.set_caption("Угадай город! (Нажмите любую клавишу для следующего)")
     clock = pygame.time.Clock()
 
-    current_slide_index = -1
+    decoder = SlideDecoder(SurfaceCache(SURFACE_CACHE_MAX_BYTES))
+    current_slide_index = -1  # Slide the player asked for
+    shown_slide_index = -1  # Slide on the screen
+    want_next_slide = False  # A key was pressed while the next slide was still loading
     current_image_surface = None
     running = True
 
     while running:
+        # Pick up slides prepared in the background without blocking the frame
+        while not producer_done:
+            try:
+                slide = slide_queue.get_nowait()
+            except queue.Empty:
+                break
+            if slide is None:
+                producer_done = True
+                print(f"\nВсе слайды подготовлены: {len(game_slides)}.")
+            else:
+                game_slides.append(slide)
+
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
             elif event.type == pygame.KEYDOWN:
-                current_slide_index = (current_slide_index + 1) % len(game_slides)
-                slide_data = game_slides[current_slide_index]
-                try:
-                    image_stream = io.BytesIO(slide_data["image_bytes"])
-                    current_image_surface = pygame.image.load(image_stream).convert()
-                    print(f"\nСлайд {current_slide_index + 1}/{len(game_slides)}. Какой это город?")
-                except pygame.error as e:
-                    print(f"Ошибка загрузки изображения для слайда {current_slide_index}: {e}")
-                    current_image_surface = None
+                want_next_slide = True
+
+        if want_next_slide and (current_slide_index + 1 < len(game_slides) or producer_done):
+            # Otherwise the player caught up with the producer: keep the frame going until it delivers
+            current_slide_index = (current_slide_index + 1) % len(game_slides)
+            want_next_slide = False
+
+        upcoming = range(max(current_slide_index, 0), current_slide_index + DECODE_AHEAD + 1)
+        decoder.prefetch(game_slides, sorted({i % len(game_slides) for i in upcoming}))
+
+        if current_slide_index != shown_slide_index:
+            if current_slide_index in decoder.failed:
+                current_image_surface = None
+                shown_slide_index = current_slide_index
+            else:
+                surface = decoder.surface(current_slide_index)
+                if surface is not None:  # Not decoded yet: the previous slide stays for a frame or two
+                    current_image_surface = surface
+                    shown_slide_index = current_slide_index
+                    total = len(game_slides) if producer_done else f"{len(game_slides)}+"
+                    print(f"\nСлайд {current_slide_index + 1}/{total}. Какой это город?")
+        else:
+            decoder.poll()
 
         screen.fill((0, 0, 0))
         if current_image_surface:
@@ -195,6 +437,7 @@ if __name__ == "__main__":
         pygame.display.flip()
         clock.tick(FPS)
 
+    decoder.close()
     pygame.quit()
     print("\nИгра завершена.")
     sys.exit(0)
@@ -0,0 +1,77 @@
+import pytest
+
+from utils import address
+from utils.address import AddressIndex, normalize_address
+
+
+def test_normalize_address_expands_abbreviations_and_folds_punctuation():
+    assert normalize_address("Москва, ул.Льва Толстого, д.16") == "москва улица льва толстого дом 16"
+    assert normalize_address("пр-т Мира,  16/2") == "проспект мира 16/2"
+    assert normalize_address("Ростов-на-Дону, Ёлочная") == "ростов-на-дону елочная"
+
+
+def test_normalize_partial_keeps_an_unfinished_last_word():
+    assert normalize_address("москва, пр", partial=True) == "москва пр"
+    assert normalize_address("москва, пр.", partial=True) == "москва проспект"
+    assert normalize_address("москва, пр") == "москва проспект"
+
+
+def test_complete_matches_prefixes_of_any_word_suffix():
+    index = AddressIndex(100)
+    index.add("тверская 1", "Россия, Москва, Тверская улица, 1", 37.61, 55.75)
+    index.add("арбат 10", "Россия, Москва, улица Арбат, 10", 37.59, 55.75)
+
+    assert index.complete("Твер") == [("Россия, Москва, Тверская улица, 1", 37.61, 55.75)]
+    assert index.complete("ул. Арб") == [("Россия, Москва, улица Арбат, 10", 37.59, 55.75)]
+    assert [result[0] for result in index.complete("москва")] == [
+        "Россия, Москва, улица Арбат, 10", "Россия, Москва, Тверская улица, 1"]
+    assert index.complete("ленинград") == []
+    assert index.complete("   ") == []
+
+
+def test_complete_respects_limit_and_deduplicates_entries():
+    index = AddressIndex(100)
+    for house in range(20):
+        index.add(f"тверская {house}", f"Москва, Тверская улица, {house}", 37.6, 55.7)
+    index.add("тверская 1", "Москва, Тверская улица, 1", 37.6, 55.7)  # Same address again
+
+    assert len(index) == 20
+    assert len(index.complete("тверская", limit=5)) == 5
+    assert len(index.complete("тверская", limit=50)) == 20
+
+
+def test_pending_keys_are_merged_and_stay_searchable(monkeypatch):
+    monkeypatch.setattr(address, "MERGE_PENDING_KEYS", 8)
+    index = AddressIndex(1000)
+    for house in range(100):
+        index.add(f"арбат {house}", f"Москва, Арбат, {house}", 37.59, 55.75)
+
+    assert index._keys and len(index._pending) <= max(8, len(index._keys) // 16)
+    assert index._keys == sorted(index._keys)
+    assert len(index.complete("арбат", limit=1000)) == 100
+    assert index.complete("москва арбат 42") == [("Москва, Арбат, 42", 37.59, 55.75)]
+
+
+def test_oldest_addresses_are_evicted_past_max_entries(monkeypatch):
+    monkeypatch.setattr(address, "MERGE_PENDING_KEYS", 4)
+    index = AddressIndex(10)
+    for house in range(30):
+        index.add(f"арбат {house}", f"Москва, Арбат, {house}", 37.59, 55.75)
+
+    assert len(index) == 10
+    assert {result[0] for result in index.complete("арбат", limit=100)} == \
+        {f"Москва, Арбат, {house}" for house in range(20, 30)}
+    # Keys of evicted entries are dropped from the sorted list on merge
+    assert all(entry in index._entries for _, entry in index._keys)
+
+
+@pytest.mark.parametrize("max_entries", [5, 100])
+def test_add_many_matches_one_by_one_adds(max_entries):
+    results = [(f"пер {house}", f"Москва, Кривоколенный переулок, {house}", 37.6, 55.76) for house in range(40)]
+    bulk, single = AddressIndex(max_entries), AddressIndex(max_entries)
+    bulk.add_many(results)
+    for result in results:
+        single.add(*result)
+
+    assert bulk.complete("кривоколенный", limit=100) == single.complete("кривоколенный", limit=100)
+    assert bulk.complete("переулок 3") == single.complete("переулок 3")
@@ -0,0 +1,18 @@
+from utils.geocoder import geocoder_cache_key
+
+
+def test_reverse_keys_keep_coordinate_signs():
+    points = ["-170.5,65.1", "170.5,65.1", "170.5,-65.1", "-170.5,-65.1"]
+    for kind in ("house", None, "hydro"):
+        assert len({geocoder_cache_key(point, kind, 1) for point in points}) == len(points)
+    assert len({geocoder_cache_key(point, "district", 1, quantize=False) for point in points}) == len(points)
+
+
+def test_quantized_reverse_keys_keep_coordinate_signs():
+    points = ["-170.5,65.1", "170.5,65.1", "170.5,-65.1"]
+    assert len({geocoder_cache_key(point, "district", 1) for point in points}) == len(points)
+
+
+def test_address_spelling_variants_share_a_key():
+    assert geocoder_cache_key("Москва, ул. Льва Толстого, д.16") == \
+        geocoder_cache_key("москва  улица льва толстого дом 16")
@@ -0,0 +1,26 @@
+from utils import geosearch
+
+TOTAL = 25
+INVALID = {3}  # A feature without coordinates, dropped by _fetch_page
+
+
+def fake_features(coords_lonlat, text_query, num_results, org_type, skip):
+    for i in range(skip, min(skip + num_results, TOTAL)):
+        if i in INVALID:
+            yield {"geometry": {}}
+        else:
+            yield {"geometry": {"coordinates": [37.6, 55.7]},
+                   "properties": {"CompanyMetaData": {"id": str(i), "name": f"Аптека {i}"}}}
+
+
+def test_invalid_feature_does_not_end_pagination(monkeypatch):
+    monkeypatch.setattr(geosearch, "iter_geosearch_features", fake_features)
+    organizations = list(geosearch.iter_organizations((37.6, 55.7), "аптека", page_size=10))
+    assert len(organizations) == TOTAL - len(INVALID)
+
+
+def test_limit_is_filled_past_invalid_features(monkeypatch):
+    monkeypatch.setattr(geosearch, "iter_geosearch_features", fake_features)
+    organizations = list(geosearch.iter_organizations((37.6, 55.7), "аптека", limit=10, page_size=5))
+    assert [organization.name for organization in organizations] == \
+        [f"Аптека {i}" for i in range(11) if i not in INVALID]
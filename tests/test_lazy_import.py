@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from utils.lazy import lazy_import
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Fresh interpreter: numpy must not be imported yet when the threads start
+_CONCURRENT_FIRST_ACCESS = """
+import sys, threading
+from utils.lazy import lazy_import
+
+np = lazy_import("numpy")
+assert "numpy" not in sys.modules
+barrier = threading.Barrier(16)
+errors = []
+
+def work():
+    barrier.wait()
+    try:
+        np.radians(180.0)
+    except Exception as e:
+        errors.append(repr(e))
+
+threads = [threading.Thread(target=work) for _ in range(16)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+print(len(errors), *errors[:1])
+"""
+
+
+def test_concurrent_first_access_sees_the_whole_module():
+    pytest.importorskip("numpy")
+    for _ in range(3):
+        result = subprocess.run([sys.executable, "-c", _CONCURRENT_FIRST_ACCESS],
+                                capture_output=True, text=True, check=True, cwd=ROOT)
+        assert result.stdout.strip() == "0"
+
+
+def test_missing_module_fails_at_lazy_import():
+    with pytest.raises(ModuleNotFoundError):
+        lazy_import("no_such_module_here")
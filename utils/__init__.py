@@ -1,3 +1,11 @@
-from . import config
-from . import geo_utils
-from . import map_utils
\ No newline at end of file
+import importlib
+
+# Submodules are imported on first access (utils.geo_utils, ...), not with
+# the package: importing any utils module shouldn't load NumPy and friends
+__all__ = ["config", "geo_utils", "map_utils"]
+
+
+def __getattr__(name):
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
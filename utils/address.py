@@ -0,0 +1,174 @@
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+# Abbreviations of Russian address parts and what they stand for. Keys are
+# lowercase, without the trailing dot (punctuation is folded before lookup).
+ABBREVIATIONS = {
+    "г": "город",
+    "обл": "область",
+    "р-н": "район",
+    "мкр": "микрорайон",
+    "мкрн": "микрорайон",
+    "пос": "поселок",
+    "ул": "улица",
+    "пр": "проспект",
+    "пр-т": "проспект",
+    "просп": "проспект",
+    "пр-д": "проезд",
+    "пер": "переулок",
+    "пл": "площадь",
+    "б-р": "бульвар",
+    "бул": "бульвар",
+    "ш": "шоссе",
+    "наб": "набережная",
+    "туп": "тупик",
+    "им": "имени",
+    "д": "дом",
+    "корп": "корпус",
+    "к": "корпус",
+    "стр": "строение",
+}
+
+# Completion candidates ranked per lookup; a one-letter prefix can match most keys
+MAX_COMPLETION_CANDIDATES = 1000
+# Pending keys merged into the sorted list at once (at least; or 1/16 of the list)
+MERGE_PENDING_KEYS = 4096
+
+# Everything except letters, digits, "/" (house 16/2) and "-" (Ростов-на-Дону, пр-т)
+_SEPARATORS = re.compile(r"[^\w/-]+")
+
+
+def normalize_address(text, partial=False):
+    """
+    Canonical form of an address: lowercase, "ё" as "е", punctuation folded
+    into single spaces and abbreviations expanded ("ул. Льва Толстого, д.16"
+    -> "улица льва толстого дом 16"). Spelling variants of one address get
+    the same string, so it serves as the Geocoder cache key.
+
+    With ``partial`` the text is a prefix being typed: its last word is not
+    expanded unless it is finished by a separator ("пр" may become
+    "пресненская", "пр." is "проспект").
+    """
+    text = text.lower().replace("ё", "е")
+    # "д.16", "ул.Тверская": a dot glued to the next word still separates
+    words = [word.strip("-") for word in _SEPARATORS.split(text)]
+    words = [word for word in words if word]
+    open_word = partial and words and not _SEPARATORS.fullmatch(text[-1:] or " ")
+    expanded = [ABBREVIATIONS.get(word, word) for word in (words[:-1] if open_word else words)]
+    if open_word:
+        expanded.append(words[-1])
+    return " ".join(expanded)
+
+
+class AddressIndex:
+    """
+    Prefix index of geocoded addresses for autocomplete.
+
+    Each address is stored under its normalized form and under every suffix
+    of it that starts at a word, so "тверская 1" finds "россия москва
+    тверская улица 1"; the query that found it is stored too. Keys live in
+    a large sorted list plus a smaller sorted list of recent keys, both
+    searched by bisection; the small one is merged into the large one in
+    linear time once it grows past MERGE_PENDING_KEYS keys or 1/16 of the
+    large one, whichever is more, so an add doesn't shift the whole index. Past ``max_entries`` addresses the ones
+    least recently added are dropped.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._keys = []  # Sorted (normalized key, entry id) pairs
+        self._pending = []  # Sorted pairs not merged into _keys yet
+        self._evicted = False  # _keys has pairs of dropped entries
+        self._entries = OrderedDict()  # Entry id -> (address, lon, lat, normalized), oldest first
+        self._by_address = {}  # Normalized address -> entry id
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _add(self, query, address, lon, lat):
+        """Records the entry and returns its new (key, entry id) pairs."""
+        normalized = normalize_address(address)
+        if not normalized:
+            return []
+        pairs = []
+        entry = self._by_address.get(normalized)
+        if entry is None:
+            entry = self._by_address[normalized] = self._next_id
+            self._next_id += 1
+            self._entries[entry] = (address, lon, lat, normalized)
+            words = normalized.split(" ")
+            pairs.extend((" ".join(words[i:]), entry) for i in range(len(words)))
+        else:
+            self._entries.move_to_end(entry)
+        normalized_query = normalize_address(query)
+        if normalized_query and normalized_query != normalized:
+            pairs.append((normalized_query, entry))
+
+        while len(self._entries) > self.max_entries:
+            _, (_, _, _, evicted) = self._entries.popitem(last=False)
+            del self._by_address[evicted]  # Its keys are skipped, then dropped on the next merge
+            self._evicted = True
+        return pairs
+
+    @staticmethod
+    def _contains(pairs, pair):
+        position = bisect_left(pairs, pair)
+        return position < len(pairs) and pairs[position] == pair
+
+    def _merge(self):
+        self._keys += self._pending
+        self._keys.sort()  # Two sorted runs: timsort merges them in linear time
+        self._pending = []
+        if self._evicted:
+            self._keys = [pair for pair in self._keys if pair[1] in self._entries]
+            self._evicted = False
+
+    def add(self, query, address, lon, lat):
+        """Records that ``query`` was geocoded to ``address`` at (lon, lat)."""
+        with self._lock:
+            for pair in self._add(query, address, lon, lat):
+                if not self._contains(self._keys, pair) and not self._contains(self._pending, pair):
+                    insort(self._pending, pair)
+            if len(self._pending) > max(MERGE_PENDING_KEYS, len(self._keys) // 16):
+                self._merge()
+
+    def add_many(self, results):
+        """Adds (query, address, lon, lat) tuples, oldest first, sorting the keys once."""
+        with self._lock:
+            pairs = set()
+            for query, address, lon, lat in results:
+                pairs.update(self._add(query, address, lon, lat))
+            pairs.difference_update(self._keys)
+            pairs.update(self._pending)
+            self._pending = sorted(pairs)
+            self._merge()
+
+    def complete(self, prefix, limit=10):
+        """
+        Returns up to ``limit`` addresses matching a partially typed one, as
+        [(address, lon, lat), ...], shortest match first.
+        """
+        normalized = normalize_address(prefix, partial=True)
+        if not normalized:
+            return []
+        with self._lock:
+            candidates = []
+            for pairs in (self._keys, self._pending):
+                start = bisect_left(pairs, (normalized,))
+                end = min(bisect_left(pairs, (normalized + "\uffff",), start),
+                          start + MAX_COMPLETION_CANDIDATES)
+                candidates.extend(pairs[start:end])
+            # Shorter keys match the typed text more closely
+            candidates.sort(key=lambda pair: len(pair[0]))
+            results, seen = [], set()
+            for _, entry in candidates:
+                if entry not in seen and entry in self._entries:
+                    seen.add(entry)
+                    results.append(self._entries[entry][:3])
+                    if len(results) == limit:
+                        break
+            return results
@@ -0,0 +1,225 @@
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+from utils.config import (
+    HTTP_POOL_SIZE, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT,
+    HTTP_RATE_LIMIT_PER_SECOND, HTTP_RATE_LIMIT_BURST,
+    HTTP_MAX_RETRIES, HTTP_RETRY_BACKOFF, HTTP_RETRY_BACKOFF_MAX, HTTP_RETRY_STATUSES
+)
+
+# One keep-alive session per API server ("scheme://host"), created on first use
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _server_key(server_url):
+    parts = urlsplit(server_url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def get_session(server_url, pool_size=None):
+    """
+    Returns the shared requests.Session for the server of the given URL.
+
+    The session keeps TCP/TLS connections alive between calls, so only the
+    first request to a server pays for the handshake.
+
+    Args:
+        server_url (str): Any URL on the API server (e.g. GEOCODER_API_SERVER).
+        pool_size (int): Max pooled connections for this server. Only used when
+                         the session is created; defaults to HTTP_POOL_SIZE.
+
+    Returns:
+        requests.Session: Session bound to the server.
+    """
+    key = _server_key(server_url)
+    session = _sessions.get(key)
+    if session is not None:
+        return session
+
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            # requests is imported on the first real request: a run answered
+            # from the local caches doesn't pay for loading it
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            size = pool_size or HTTP_POOL_SIZE
+            # pool_block=True: extra threads wait for a free connection
+            # instead of opening (and then throwing away) new ones
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size, pool_block=True)
+            session = requests.Session()
+            session.mount(key, adapter)
+            _sessions[key] = session
+    return session
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: ``rate`` requests per second on average,
+    up to ``burst`` at once after an idle period.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Takes one token, sleeping until it is available."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve the token even if it is not there yet: the balance goes
+            # negative and callers queue up in order instead of racing
+            wait = (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0
+            self._tokens -= 1
+        if wait > 0:
+            time.sleep(wait)
+
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(server_url):
+    """Returns the shared TokenBucket of the server of the given URL."""
+    key = _server_key(server_url)
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(key)
+        if limiter is None:
+            limiter = TokenBucket(HTTP_RATE_LIMIT_PER_SECOND, HTTP_RATE_LIMIT_BURST)
+            _rate_limiters[key] = limiter
+    return limiter
+
+
+class _InFlightCall:
+    __slots__ = ("done", "response", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+# Identical requests currently being sent: key -> _InFlightCall
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def _single_flight(key, func):
+    """
+    Runs ``func`` once for all threads asking for the same key at the same time;
+    the others wait and get the same result (or exception).
+    """
+    with _in_flight_lock:
+        call = _in_flight.get(key)
+        is_leader = call is None
+        if is_leader:
+            call = _InFlightCall()
+            _in_flight[key] = call
+
+    if not is_leader:
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.response
+
+    try:
+        call.response = func()
+        return call.response
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _in_flight_lock:
+            del _in_flight[key]
+        call.done.set()
+
+
+def _retry_delay(attempt, response=None):
+    """Exponential backoff with full jitter; honors a numeric Retry-After header."""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), HTTP_RETRY_BACKOFF_MAX)
+    return random.uniform(0, min(HTTP_RETRY_BACKOFF_MAX, HTTP_RETRY_BACKOFF * 2 ** attempt))
+
+
+def _get_with_retries(server_url, params, timeout, stream):
+    import requests
+
+    session = get_session(server_url)
+    limiter = get_rate_limiter(server_url)
+    attempt = 0
+    while True:
+        limiter.acquire()
+        try:
+            response = session.get(server_url, params=params, timeout=timeout, stream=stream)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt >= HTTP_MAX_RETRIES:
+                raise
+            time.sleep(_retry_delay(attempt))
+            attempt += 1
+            continue
+
+        if response.status_code not in HTTP_RETRY_STATUSES or attempt >= HTTP_MAX_RETRIES:
+            return response
+        delay = _retry_delay(attempt, response)
+        response.close()
+        time.sleep(delay)
+        attempt += 1
+
+
+def api_get(server_url, params, timeout=None, stream=False):
+    """
+    Sends a GET request to a Yandex API server through its pooled session.
+
+    Every attempt passes the server's rate limiter; 429/5xx responses and
+    connection errors are retried with exponential backoff and jitter.
+    Identical concurrent requests are sent only once and share the response
+    (except streamed ones, whose body can be read only once).
+
+    Args:
+        server_url (str): API endpoint URL.
+        params (dict): Query parameters.
+        timeout (float or tuple): Overrides the shared (connect, read) timeouts.
+        stream (bool): Passed to requests; the body is read lazily if True.
+
+    Returns:
+        requests.Response: The last response (status is not checked here).
+
+    Raises:
+        requests.exceptions.RequestException: If the request failed after all retries.
+    """
+    if timeout is None:
+        timeout = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+    if stream:
+        return _get_with_retries(server_url, params, timeout, stream)
+
+    key = (server_url, tuple(sorted((name, str(value)) for name, value in params.items())))
+    return _single_flight(key, lambda: _get_with_retries(server_url, params, timeout, stream))
+
+
+def __getattr__(name):
+    # api_client.RequestException for callers' except clauses: an except
+    # expression is evaluated only when an exception propagates, so requests
+    # stays unloaded on paths that never reach the network
+    if name == "RequestException":
+        from requests.exceptions import RequestException
+        return RequestException
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def close_sessions():
+    """Closes all pooled sessions (e.g. before the process exits)."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -0,0 +1,214 @@
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from utils.log import get_logger
+
+logger = get_logger("cache")
+
+# How often (in seconds) a cache hit refreshes the LRU timestamp of an entry.
+# Touching on every hit would turn each read into a write.
+ACCESS_TOUCH_INTERVAL = 60
+# Check the size cap once per this many writes (COUNT(*) is a table scan)
+EVICT_CHECK_EVERY = 64
+REFRESH_WORKERS = 4  # Background refreshes of stale entries running at once
+# Stale keys waiting for a refresh worker; more are dropped (and refreshed on a later hit)
+REFRESH_QUEUE_SIZE = 1000
+# At exit, how long (seconds) to let queued refreshes finish. Refresh workers
+# are daemon threads: a CLI that answered from a stale entry doesn't wait for
+# the upstream (or its retries) beyond this.
+REFRESH_EXIT_WAIT = 0.5
+
+
+class SqliteCache:
+    """
+    Persistent key/value cache stored in an SQLite file.
+
+    Values are JSON-serializable objects. Entries older than ``ttl_seconds``
+    are treated as missing; when the table grows past ``max_entries`` the
+    least recently used entries are evicted. The database runs in WAL mode,
+    so several processes (and threads - each gets its own connection) can
+    read and write the same file at once.
+
+    With ``stale_seconds`` an expired entry is kept that much longer and
+    ``lookup`` still returns it, marked stale, so the caller can answer at
+    once and refresh it in the background (refresh_in_background).
+    """
+
+    def __init__(self, path, table, ttl_seconds, max_entries, stale_seconds=0):
+        self.path = path
+        self.table = table
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.stale_seconds = stale_seconds
+        self._local = threading.local()
+        self._writes_lock = threading.Lock()
+        self._writes = 0
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_accessed ON {self.table}(accessed)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """
+        Returns the cached value for ``key`` or None if it is missing/expired.
+        Cache errors are reported and treated as a miss.
+        """
+        value, stale = self.lookup(key)
+        return None if stale else value
+
+    def lookup(self, key):
+        """
+        Returns (value, stale): the cached value for ``key`` (None if missing)
+        and whether it is past ``ttl_seconds`` but still within ``stale_seconds``.
+        Cache errors are reported and treated as a miss.
+        """
+        now = time.time()
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                f"SELECT value, created, accessed FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None, False
+
+            value, created, accessed = row
+            age = now - created
+            if age > self.ttl_seconds + self.stale_seconds:
+                conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                return None, False
+            if now - accessed > ACCESS_TOUCH_INTERVAL:
+                conn.execute(f"UPDATE {self.table} SET accessed = ? WHERE key = ?", (now, key))
+            return json.loads(value), age > self.ttl_seconds
+
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"   Предупреждение: кэш '{self.table}' недоступен: {e}")
+            return None, False
+
+    def set(self, key, value):
+        """Stores ``value`` under ``key`` and evicts old entries if needed."""
+        now = time.time()
+        try:
+            conn = self._connect()
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created, accessed) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now)
+            )
+            with self._writes_lock:
+                check_size = self._writes % EVICT_CHECK_EVERY == 0
+                self._writes += 1
+            if check_size:
+                self._evict(conn)
+
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(f"   Предупреждение: не удалось записать в кэш '{self.table}': {e}")
+
+    def _evict(self, conn):
+        # A single statement is atomic, so concurrent processes can't
+        # interleave between the count and the delete
+        conn.execute(
+            f"DELETE FROM {self.table} WHERE key IN ("
+            f"SELECT key FROM {self.table} ORDER BY accessed "
+            f"LIMIT max(0, (SELECT COUNT(*) FROM {self.table}) - ?))",
+            (self.max_entries,)
+        )
+
+    def items(self):
+        """
+        Yields (key, value) of all entries that haven't expired (stale ones
+        included), most recently used first. Rows are read as the caller
+        iterates, so stopping early doesn't load the rest.
+        """
+        try:
+            rows = self._connect().execute(
+                f"SELECT key, value FROM {self.table} WHERE created >= ? ORDER BY accessed DESC",
+                (time.time() - self.ttl_seconds - self.stale_seconds,)
+            )
+            for key, value in rows:
+                try:
+                    yield key, json.loads(value)
+                except ValueError:
+                    continue
+        except sqlite3.Error as e:
+            logger.warning(f"   Предупреждение: кэш '{self.table}' недоступен: {e}")
+
+    def delete(self, key):
+        try:
+            self._connect().execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            logger.warning(f"   Предупреждение: не удалось удалить запись из кэша '{self.table}': {e}")
+
+    def clear(self):
+        try:
+            self._connect().execute(f"DELETE FROM {self.table}")
+        except sqlite3.Error as e:
+            logger.warning(f"   Предупреждение: не удалось очистить кэш '{self.table}': {e}")
+
+
+_refresh_queue = queue.Queue(REFRESH_QUEUE_SIZE)  # (key, refresh) pairs
+_refresh_workers = []
+_refreshing = set()  # Keys queued or being refreshed
+_refreshing_lock = threading.Lock()
+_refreshes_done = threading.Condition(_refreshing_lock)
+
+
+def _refresh_worker():
+    while True:
+        key, refresh = _refresh_queue.get()
+        try:
+            refresh()
+        except Exception as e:
+            logger.warning(f"   Предупреждение: не удалось обновить устаревшую запись кэша: {e}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(key)
+                _refreshes_done.notify_all()
+
+
+def refresh_in_background(key, refresh):
+    """
+    Queues ``refresh()`` (which re-fetches and re-caches ``key``) for one of
+    REFRESH_WORKERS daemon threads, unless the key is already queued. When
+    the queue is full the refresh is dropped: the stale entry is still
+    served and queued again on a later hit. Errors are logged the same way.
+    """
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        try:
+            _refresh_queue.put_nowait((key, refresh))
+        except queue.Full:
+            return
+        _refreshing.add(key)
+        while len(_refresh_workers) < REFRESH_WORKERS:
+            worker = threading.Thread(target=_refresh_worker, name="cache-refresh", daemon=True)
+            worker.start()
+            _refresh_workers.append(worker)
+
+
+def _wait_for_refreshes(timeout=REFRESH_EXIT_WAIT):
+    """Gives queued refreshes a short chance to land before the process exits."""
+    with _refreshes_done:
+        _refreshes_done.wait_for(lambda: not _refreshing, timeout)
+
+
+atexit.register(_wait_for_refreshes)
@@ -1,9 +1,95 @@
+import os
+
 # API Ключи (из урока) - учебные
 GEOCODER_API_KEY = "8013b162-6b42-4997-9691-77b7074026e0"
 STATIC_MAPS_API_KEY = "f3a0fe3a-b07e-4840-a1da-06f18b2ddf13"
 GEOSEARCH_API_KEY = "dda3ddba-c9ea-4ead-9010-f43fbc15c6e3"
 
-# API Серверы
-GEOCODER_API_SERVER = "http://geocode-maps.yandex.ru/1.x/"
-STATIC_MAPS_API_SERVER = "https://static-maps.yandex.ru/v1"
-GEOSEARCH_API_SERVER = "https://search-maps.yandex.ru/v1/"
\ No newline at end of file
+# API Серверы (переменные окружения позволяют подменить их, например, локальным
+# mock-сервером из benchmarks/mock_server.py)
+GEOCODER_API_SERVER = os.environ.get("YANDEX_GEOCODER_API_SERVER", "http://geocode-maps.yandex.ru/1.x/")
+STATIC_MAPS_API_SERVER = os.environ.get("YANDEX_STATIC_MAPS_API_SERVER", "https://static-maps.yandex.ru/v1")
+GEOSEARCH_API_SERVER = os.environ.get("YANDEX_GEOSEARCH_API_SERVER", "https://search-maps.yandex.ru/v1/")
+
+# HTTP-клиент (utils/api_client.py)
+HTTP_POOL_SIZE = 10  # Максимум keep-alive соединений на один API-сервер
+HTTP_CONNECT_TIMEOUT = 3.05  # Секунды на установку соединения
+HTTP_READ_TIMEOUT = 10  # Секунды на ожидание ответа
+HTTP_RATE_LIMIT_PER_SECOND = 20  # Запросов в секунду к одному API-серверу (token bucket)
+HTTP_RATE_LIMIT_BURST = 20  # Сколько запросов можно отправить разом после простоя
+HTTP_MAX_RETRIES = 3  # Повторы при 429/5xx и сетевых ошибках
+HTTP_RETRY_BACKOFF = 0.5  # Секунды, базовая задержка экспоненциального backoff
+HTTP_RETRY_BACKOFF_MAX = 8  # Секунды, верхняя граница задержки
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Постраничный поиск организаций (utils/geosearch.py)
+GEOSEARCH_PAGE_SIZE = 50  # Максимум results за один запрос Geosearch
+GEOSEARCH_MAX_RESULTS = 1000  # Дальше skip API не отдает
+GEOSEARCH_PREFETCH_PAGES = 3  # Сколько страниц запрашивается одновременно
+
+# Локальные кэши (utils/cache.py)
+CACHE_ENABLED = os.environ.get("YANDEX_MAPS_CACHE", "1") != "0"  # YANDEX_MAPS_CACHE=0 отключает кэши
+CACHE_DIR = os.environ.get(
+    "YANDEX_MAPS_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache")
+)
+GEOCODER_CACHE_TTL = 30 * 24 * 3600  # Секунды, сколько ответ Геокодера считается свежим
+GEOCODER_CACHE_MAX_ENTRIES = 100_000  # Сверх этого вытесняются давно не использованные записи
+# Сколько еще после TTL устаревший ответ отдается сразу, пока в фоне запрашивается свежий
+GEOCODER_CACHE_STALE = 7 * 24 * 3600
+GEOSEARCH_CACHE_TTL = 7 * 24 * 3600  # Организации меняются чаще адресов
+GEOSEARCH_CACHE_STALE = 7 * 24 * 3600
+GEOSEARCH_CACHE_MAX_ENTRIES = 20_000
+NEGATIVE_CACHE_TTL = 3600  # Секунды, сколько помнится "ничего не найдено" (Геокодер и Geosearch)
+# Обратное геокодирование кэшируется по ячейке geohash точки, а не по точным координатам:
+# соседние точки почти всегда в том же районе/городе. Знаков geohash по kind
+# (4 ~ 39x20 км, 5 ~ 4.9x4.9 км, 6 ~ 1.2x0.6 км, 7 ~ 150x150 м, 8 ~ 38x19 м);
+# kind, которого нет в списке (и house), кэшируется по точным координатам.
+# Доля неверных ответов при данной точности: python -m benchmarks.bench_reverse_cache
+REVERSE_GEOCODE_GEOHASH_PRECISION = {
+    "country": 3,
+    "province": 4,
+    "area": 5,
+    "locality": 5,
+    "district": 6,
+    "metro": 7,
+    "street": 8,
+}
+# Адресов в индексе автодополнения (utils/address.py); сверх этого вытесняются давно добавленные
+ADDRESS_INDEX_MAX_ENTRIES = 20_000
+STATIC_MAPS_CACHE_MAX_BYTES = 200 * 1024 * 1024  # Лимит размера кэша картинок Static API
+STATIC_MAPS_CACHE_PRECISION = 5  # Знаков после запятой в ll/spn/pt ключа (None - без округления)
+
+# Карты с большим числом меток (utils/map_render.py)
+STATIC_MAPS_SIZE = (650, 450)  # Максимальный размер картинки Static API, пикселей
+STATIC_MAPS_MAX_MARKERS = 100  # Меток в одном запросе (ограничение API и длины URL)
+MARKER_CLUSTER_CELL_PX = 48  # Размер ячейки кластеризации меток, пикселей
+# Рисовать метки локально поверх подложки без меток (одна подложка на разные наборы меток);
+# YANDEX_MAPS_LOCAL_MARKERS=0 - метки рисует Static API
+MAP_LOCAL_MARKERS = os.environ.get("YANDEX_MAPS_LOCAL_MARKERS", "1") != "0"
+BASE_MAP_SNAP_PX = 64  # Центр подложки выравнивается по сетке с таким шагом, пикселей
+
+# Сборка карт из тайлов (utils/tiles.py): YANDEX_MAPS_TILES=1 включает для task_01 и task_05
+MAP_TILES = os.environ.get("YANDEX_MAPS_TILES", "0") == "1"
+TILE_FETCH_PX = 450  # Размер запрашиваемой картинки; от нее остается центральный тайл 256x256
+
+# Локальные границы районов (utils/district_index.py): GeoJSON с полигонами районов.
+# Если файл задан, район определяется без обратного геокодирования.
+DISTRICTS_GEOJSON_PATH = os.environ.get("YANDEX_MAPS_DISTRICTS_GEOJSON")
+DISTRICTS_NAME_PROPERTY = "name"  # Свойство feature с названием района
+
+# Логирование и метрики (utils/log.py, utils/metrics.py)
+LOG_FORMAT = os.environ.get("YANDEX_MAPS_LOG_FORMAT", "text")  # "text" или "json" (по строке на событие)
+LOG_LEVEL = os.environ.get("YANDEX_MAPS_LOG_LEVEL", "INFO")  # DEBUG выводит каждый вызов API
+METRICS_FILE = os.environ.get("YANDEX_MAPS_METRICS_FILE")  # При выходе: *.prom - Prometheus, иначе JSON
+
+# Постоянно работающий HTTP-сервис (tasks/service.py)
+SERVICE_HOST = os.environ.get("YANDEX_MAPS_SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.environ.get("YANDEX_MAPS_SERVICE_PORT", "8080"))
+SERVICE_WORKERS = 32  # Потоков для обращений к API (и соединений в пуле на каждый сервер)
+SERVICE_CACHE_TTL = 300  # Секунды, сколько ответ сервиса хранится в памяти процесса
+SERVICE_CACHE_MAX_ENTRIES = 10_000
+
+# Предрассчитанный набор слайдов игры "Угадай город" (utils/slide_pack.py)
+SLIDE_PACK_PATH = os.environ.get("YANDEX_MAPS_SLIDE_PACK", os.path.join(CACHE_DIR, "cities.slidepack"))
+SLIDE_PACK_VIEWS = 3  # Сколько случайных видов каждого города сохраняется в наборе
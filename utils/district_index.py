@@ -0,0 +1,183 @@
+import json
+import threading
+
+import numpy as np
+
+from utils.config import DISTRICTS_GEOJSON_PATH, DISTRICTS_NAME_PROPERTY
+from utils.log import get_logger
+
+logger = get_logger("district_index")
+
+NODE_CAPACITY = 8  # Children per STR-tree node
+PIP_CHUNK_CELLS = 2_000_000  # Max edges x points evaluated at once in point-in-polygon
+
+
+class _Polygon:
+    """A polygon (exterior + holes) with precomputed edge arrays and bbox."""
+
+    __slots__ = ("name", "bbox", "x1", "y1", "x2", "y2")
+
+    def __init__(self, name, rings):
+        self.name = name
+        starts, ends = [], []
+        for ring in rings:
+            ring = np.asarray(ring, dtype=np.float64)[:, :2]
+            starts.append(ring)
+            ends.append(np.roll(ring, -1, axis=0))  # Closes the ring if it isn't closed
+        starts = np.concatenate(starts)
+        ends = np.concatenate(ends)
+        self.x1, self.y1 = starts[:, 0], starts[:, 1]
+        self.x2, self.y2 = ends[:, 0], ends[:, 1]
+        self.bbox = (starts[:, 0].min(), starts[:, 1].min(), starts[:, 0].max(), starts[:, 1].max())
+
+    def contains(self, xs, ys):
+        """Vectorized even-odd ray casting; returns a bool mask for the points."""
+        inside = np.zeros(len(xs), dtype=bool)
+        chunk = max(1, PIP_CHUNK_CELLS // len(self.x1))
+        x1, y1 = self.x1[:, None], self.y1[:, None]
+        x2, y2 = self.x2[:, None], self.y2[:, None]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for start in range(0, len(xs), chunk):
+                px = xs[None, start:start + chunk]
+                py = ys[None, start:start + chunk]
+                crosses = (y1 > py) != (y2 > py)
+                x_at_py = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+                inside[start:start + chunk] = np.count_nonzero(crosses & (px < x_at_py), axis=0) % 2 == 1
+        return inside
+
+
+class _Node:
+    __slots__ = ("bbox", "children", "is_leaf")
+
+    def __init__(self, children, is_leaf):
+        self.children = children
+        self.is_leaf = is_leaf
+        boxes = np.array([child.bbox for child in children])
+        self.bbox = (boxes[:, 0].min(), boxes[:, 1].min(), boxes[:, 2].max(), boxes[:, 3].max())
+
+
+def _str_pack(items, is_leaf):
+    """One level of Sort-Tile-Recursive packing: groups items into nodes."""
+    n_nodes = -(-len(items) // NODE_CAPACITY)
+    n_slices = max(1, int(np.ceil(np.sqrt(n_nodes))))
+    per_slice = n_slices * NODE_CAPACITY
+
+    by_x = sorted(items, key=lambda item: (item.bbox[0] + item.bbox[2]) / 2)
+    nodes = []
+    for i in range(0, len(by_x), per_slice):
+        vertical_slice = sorted(by_x[i:i + per_slice], key=lambda item: (item.bbox[1] + item.bbox[3]) / 2)
+        for j in range(0, len(vertical_slice), NODE_CAPACITY):
+            nodes.append(_Node(vertical_slice[j:j + NODE_CAPACITY], is_leaf))
+    return nodes
+
+
+def _in_bbox(bbox, xs, ys):
+    return (xs >= bbox[0]) & (xs <= bbox[2]) & (ys >= bbox[1]) & (ys <= bbox[3])
+
+
+class DistrictIndex:
+    """
+    Point-in-polygon index over district boundaries, backed by an STR-tree.
+
+    Batches of points are pushed down the tree as index arrays: each node
+    only tests the points inside its bounding box, and the exact test runs
+    vectorized over all candidate points of a polygon at once.
+    """
+
+    def __init__(self, polygons):
+        self.polygons = polygons
+        self.root = None
+        if polygons:
+            level = _str_pack(polygons, is_leaf=True)
+            while len(level) > 1:
+                level = _str_pack(level, is_leaf=False)
+            self.root = level[0]
+
+    @classmethod
+    def from_geojson(cls, path, name_property=DISTRICTS_NAME_PROPERTY):
+        """
+        Loads Polygon/MultiPolygon features from a GeoJSON FeatureCollection.
+        Coordinates are [lon, lat]; the district name is read from ``name_property``.
+        """
+        with open(path, encoding="utf-8") as f:
+            collection = json.load(f)
+
+        polygons = []
+        for feature in collection.get("features", []):
+            geometry = feature.get("geometry") or {}
+            name = (feature.get("properties") or {}).get(name_property)
+            if not name:
+                continue
+            if geometry.get("type") == "Polygon":
+                polygons.append(_Polygon(name, geometry["coordinates"]))
+            elif geometry.get("type") == "MultiPolygon":
+                polygons.extend(_Polygon(name, rings) for rings in geometry["coordinates"])
+        return cls(polygons)
+
+    def lookup_many(self, points_lonlat):
+        """
+        Finds the district for each point.
+
+        Args:
+            points_lonlat (array-like): N (longitude, latitude) pairs.
+
+        Returns:
+            list: N district names (None where no polygon covers the point).
+        """
+        points = np.asarray(points_lonlat, dtype=np.float64).reshape(-1, 2)
+        names = [None] * len(points)
+        if self.root is None or len(points) == 0:
+            return names
+
+        xs, ys = points[:, 0], points[:, 1]
+        unresolved = np.ones(len(points), dtype=bool)
+        stack = [(self.root, np.arange(len(points)))]
+        while stack:
+            node, idx = stack.pop()
+            idx = idx[unresolved[idx]]
+            idx = idx[_in_bbox(node.bbox, xs[idx], ys[idx])]
+            if len(idx) == 0:
+                continue
+            if not node.is_leaf:
+                stack.extend((child, idx) for child in node.children)
+                continue
+            for polygon in node.children:
+                candidates = idx[unresolved[idx]]
+                candidates = candidates[_in_bbox(polygon.bbox, xs[candidates], ys[candidates])]
+                if len(candidates) == 0:
+                    continue
+                hits = candidates[polygon.contains(xs[candidates], ys[candidates])]
+                for i in hits:
+                    names[i] = polygon.name
+                unresolved[hits] = False
+        return names
+
+    def lookup(self, lonlat):
+        """Returns the district name for one (lon, lat) point or None."""
+        return self.lookup_many([lonlat])[0]
+
+
+_district_index = None
+_district_index_failed = False  # The file couldn't be loaded: don't retry on every lookup
+_district_index_lock = threading.Lock()
+
+
+def get_district_index():
+    """
+    Returns the shared DistrictIndex loaded from DISTRICTS_GEOJSON_PATH,
+    or None if no boundary file is configured or it can't be loaded (a
+    warning is logged once and callers fall back to reverse geocoding).
+    """
+    global _district_index, _district_index_failed
+    if DISTRICTS_GEOJSON_PATH is None:
+        return None
+    with _district_index_lock:
+        if _district_index is None and not _district_index_failed:
+            try:
+                _district_index = DistrictIndex.from_geojson(DISTRICTS_GEOJSON_PATH)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                # ValueError includes json.JSONDecodeError; KeyError/TypeError come from malformed geometry
+                logger.warning(f"Границы районов {DISTRICTS_GEOJSON_PATH} не загружены, "
+                               f"используется обратное геокодирование: {e}")
+                _district_index_failed = True
+    return _district_index
@@ -1,5 +1,12 @@
 import math
 
+from utils.lazy import lazy_import
+
+# NumPy is loaded on first use: the scalar haversine_distance doesn't need it
+np = lazy_import("numpy")
+
+EARTH_RADIUS_KM = 6371.0
+
 
 def haversine_distance(point1_lonlat, point2_lonlat):
     """
@@ -16,7 +23,7 @@ def haversine_distance(point1_lonlat, point2_lonlat):
     lon1, lat1 = point1_lonlat
     lon2, lat2 = point2_lonlat
 
-    R = 6371.0
+    R = EARTH_RADIUS_KM
 
     lon1_rad, lat1_rad, lon2_rad, lat2_rad = map(math.radians, [lon1, lat1, lon2, lat2])
 
@@ -27,3 +34,120 @@ def haversine_distance(point1_lonlat, point2_lonlat):
 
     distance = R * c
     return distance
+
+
+def _lonlat_radians(points_lonlat):
+    """Converts a sequence/array of (lon, lat) pairs to (lon, lat) arrays in radians."""
+    points = np.radians(np.asarray(points_lonlat, dtype=np.float64).reshape(-1, 2))
+    return points[:, 0], points[:, 1]
+
+
+def _haversine(lon1, lat1, lon2, lat2):
+    """Vectorized Haversine on broadcastable radian arrays, in kilometers."""
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def haversine_one_to_many(point_lonlat, points_lonlat):
+    """
+    Distances from one point to N points.
+
+    Args:
+        point_lonlat (tuple): (longitude, latitude) in degrees.
+        points_lonlat (array-like): N (longitude, latitude) pairs, shape (N, 2).
+
+    Returns:
+        numpy.ndarray: N distances in kilometers.
+    """
+    lon1, lat1 = _lonlat_radians(point_lonlat)
+    lon2, lat2 = _lonlat_radians(points_lonlat)
+    return _haversine(lon1, lat1, lon2, lat2)
+
+
+def haversine_matrix(points_a_lonlat, points_b_lonlat):
+    """
+    Full distance matrix between N and M points.
+
+    Args:
+        points_a_lonlat (array-like): N (longitude, latitude) pairs.
+        points_b_lonlat (array-like): M (longitude, latitude) pairs.
+
+    Returns:
+        numpy.ndarray: (N, M) matrix of distances in kilometers.
+    """
+    lon1, lat1 = _lonlat_radians(points_a_lonlat)
+    lon2, lat2 = _lonlat_radians(points_b_lonlat)
+    return _haversine(lon1[:, None], lat1[:, None], lon2[None, :], lat2[None, :])
+
+
+def nearest_k(point_lonlat, points_lonlat, k):
+    """
+    Finds the k points nearest to a given point.
+
+    Returns:
+        tuple: (indices, distances_km) arrays of length min(k, N), nearest first.
+    """
+    distances = haversine_one_to_many(point_lonlat, points_lonlat)
+    k = min(k, len(distances))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp), np.empty(0)
+    # argpartition is O(N); only the k selected candidates get sorted
+    indices = np.argpartition(distances, k - 1)[:k]
+    indices = indices[np.argsort(distances[indices])]
+    return indices, distances[indices]
+
+
+def nearest_k_matrix(points_a_lonlat, points_b_lonlat, k):
+    """
+    For each of N points finds its k nearest among M candidate points.
+
+    Returns:
+        tuple: (indices, distances_km) arrays of shape (N, min(k, M)), nearest first per row.
+    """
+    distances = haversine_matrix(points_a_lonlat, points_b_lonlat)
+    k = min(k, distances.shape[1])
+    if k <= 0:
+        empty = np.empty((distances.shape[0], 0))
+        return empty.astype(np.intp), empty
+    indices = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    nearest = np.take_along_axis(distances, indices, axis=1)
+    order = np.argsort(nearest, axis=1)
+    return np.take_along_axis(indices, order, axis=1), np.take_along_axis(nearest, order, axis=1)
+
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(lon, lat, precision):
+    """
+    Encodes a point as a geohash of ``precision`` characters: points with
+    a common prefix lie in the same cell (5 characters ~ 4.9 x 4.9 km,
+    6 ~ 1.2 x 0.6 km, 7 ~ 150 x 150 m).
+    """
+    lon_range, lat_range = [-180.0, 180.0], [-90.0, 90.0]
+    chars = []
+    bits, bit_count, even = 0, 0, True  # Bits alternate lon, lat, starting with lon
+    while len(chars) < precision:
+        value, value_range = (lon, lon_range) if even else (lat, lat_range)
+        middle = (value_range[0] + value_range[1]) / 2
+        if value >= middle:
+            bits = bits * 2 + 1
+            value_range[0] = middle
+        else:
+            bits = bits * 2
+            value_range[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def geohash_cell_size_km(precision, lat=0.0):
+    """Approximate (width, height) of a geohash cell of ``precision`` characters at latitude ``lat``, km."""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    km_per_deg = math.pi * EARTH_RADIUS_KM / 180
+    return (360 / 2 ** lon_bits * km_per_deg * math.cos(math.radians(lat)),
+            180 / 2 ** lat_bits * km_per_deg)
@@ -0,0 +1,207 @@
+import os
+import threading
+from itertools import islice
+
+from utils.address import AddressIndex, normalize_address
+from utils.api_client import api_get
+from utils.cache import SqliteCache, refresh_in_background
+from utils.geo_utils import geohash_encode
+from utils.metrics import instrumented_call
+from utils.records import GeoObject
+from utils.config import (
+    GEOCODER_API_KEY, GEOCODER_API_SERVER,
+    CACHE_ENABLED, CACHE_DIR, GEOCODER_CACHE_TTL, GEOCODER_CACHE_MAX_ENTRIES, GEOCODER_CACHE_STALE,
+    NEGATIVE_CACHE_TTL, REVERSE_GEOCODE_GEOHASH_PRECISION, ADDRESS_INDEX_MAX_ENTRIES
+)
+
+geocoder_cache = SqliteCache(
+    os.path.join(CACHE_DIR, "geocoder.sqlite3"), "geocoder",
+    GEOCODER_CACHE_TTL, GEOCODER_CACHE_MAX_ENTRIES, stale_seconds=GEOCODER_CACHE_STALE
+)
+# Responses with nothing found, kept briefly: a typo is not re-sent on every
+# run, but a newly added address shows up within NEGATIVE_CACHE_TTL
+geocoder_negative_cache = SqliteCache(
+    os.path.join(CACHE_DIR, "geocoder.sqlite3"), "geocoder_negative",
+    NEGATIVE_CACHE_TTL, GEOCODER_CACHE_MAX_ENTRIES
+)
+
+
+# Addresses for complete_address. Opt-in: nothing is indexed until the first
+# completion, which loads the addresses from the Geocoder cache; from then on
+# new lookups are added as they succeed. Batch geocoding never pays for it.
+address_index = AddressIndex(ADDRESS_INDEX_MAX_ENTRIES)
+_address_index_loaded = False
+_address_index_lock = threading.Lock()
+
+
+def geocoder_cache_key(query, kind=None, results=None, quantize=True):
+    """
+    Builds the cache key for a Geocoder request: normalized query + kind/results.
+    The query goes through utils.address.normalize_address, so spelling
+    variants ("ул. Тверская, д.1" / "улица тверская дом 1") share one entry.
+
+    A reverse geocoding request ("lon,lat") is keyed by the exact numbers
+    (signs included), or, with a kind listed in REVERSE_GEOCODE_GEOHASH_PRECISION,
+    by the geohash cell of the point (unless ``quantize`` is False), so
+    nearby points share one cached answer.
+    """
+    if is_coordinates(query):
+        lon, lat = map(float, query.split(","))
+        precision = REVERSE_GEOCODE_GEOHASH_PRECISION.get(kind) if quantize else None
+        if precision:
+            return f"geohash:{geohash_encode(lon, lat, precision)}|kind={kind}|results={results or ''}"
+        return f"{lon!r},{lat!r}|kind={kind or ''}|results={results or ''}"
+    return f"{normalize_address(query)}|kind={kind or ''}|results={results or ''}"
+
+
+def is_coordinates(query):
+    """True if the query is a "lon,lat" pair (i.e. a reverse geocoding request)."""
+    parts = query.split(",")
+    if len(parts) != 2:
+        return False
+    try:
+        float(parts[0])
+        float(parts[1])
+    except ValueError:
+        return False
+    return True
+
+
+def _request_geocoder_json(call, query, kind, results):
+    geocoder_params = {
+        "apikey": GEOCODER_API_KEY,
+        "geocode": query,
+        "format": "json"
+    }
+    if kind:
+        geocoder_params["kind"] = kind
+    if results:
+        geocoder_params["results"] = results
+
+    response = api_get(GEOCODER_API_SERVER, params=geocoder_params)
+    call.status, call.size = response.status_code, len(response.content)
+    response.raise_for_status()
+    return response.json()
+
+
+def _store(key, json_response):
+    if json_response.get("response", {}).get("GeoObjectCollection", {}).get("featureMember"):
+        geocoder_cache.set(key, json_response)
+    else:
+        geocoder_negative_cache.set(key, json_response)
+
+
+def _indexable_address(query, kind, json_response):
+    """(query, address, lon, lat) of a forward geocoding result without kind filter, or None."""
+    if kind or is_coordinates(query):
+        return None
+    try:
+        toponym = first_geo_object(json_response)
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+    if toponym is None or not toponym.address:
+        return None
+    return query, toponym.address, toponym.lon, toponym.lat
+
+
+def _index_address(query, kind, json_response):
+    """Adds a successful lookup to address_index once completion is in use."""
+    if _address_index_loaded:
+        result = _indexable_address(query, kind, json_response)
+        if result is not None:
+            address_index.add(*result)
+
+
+def _refresh(endpoint, key, query, kind, results):
+    with instrumented_call(endpoint, "refresh", kind=kind) as call:
+        _store(key, _request_geocoder_json(call, query, kind, results))
+
+
+def fetch_geocoder_json(query, kind=None, results=None, quantize=True):
+    """
+    Returns the Geocoder JSON response for the query, using the on-disk cache.
+
+    A response older than GEOCODER_CACHE_TTL (but within GEOCODER_CACHE_STALE)
+    is still returned at once and re-requested in the background. Responses
+    that found nothing are cached for NEGATIVE_CACHE_TTL only.
+
+    Args:
+        query (str): Address or "lon,lat" string (reverse geocoding).
+        kind (str): Optional toponym kind filter (e.g. 'district', 'locality').
+        results (int): Optional max number of results.
+        quantize (bool): Share cached reverse geocoding answers within a geohash
+            cell (see geocoder_cache_key); False caches by the exact point.
+
+    Returns:
+        dict: Parsed JSON response.
+
+    Raises:
+        requests.exceptions.RequestException: On network/HTTP errors (cache miss only).
+    """
+    endpoint = "reverse_geocode" if is_coordinates(query) else "geocode"
+    with instrumented_call(endpoint, "miss" if CACHE_ENABLED else "off", kind=kind) as call:
+        key = geocoder_cache_key(query, kind, results, quantize)
+        if CACHE_ENABLED:
+            cached, stale = geocoder_cache.lookup(key)
+            if cached is not None:
+                call.cache = "stale" if stale else "hit"
+                if stale:
+                    refresh_in_background(key, lambda: _refresh(endpoint, key, query, kind, results))
+                return cached
+            cached = geocoder_negative_cache.get(key)
+            if cached is not None:
+                call.cache = "negative"
+                return cached
+
+        json_response = _request_geocoder_json(call, query, kind, results)
+        if CACHE_ENABLED:
+            _store(key, json_response)
+        _index_address(query, kind, json_response)
+        return json_response
+
+
+def first_geo_object(json_response):
+    """
+    Returns the most relevant GeoObject (featureMember[0]) of a Geocoder response
+    as a GeoObject record, or None if nothing was found.
+
+    Raises:
+        KeyError, IndexError, ValueError: On unexpected response format.
+    """
+    feature_member = json_response["response"]["GeoObjectCollection"]["featureMember"]
+    if not feature_member:
+        return None
+    return GeoObject.from_json(feature_member[0]["GeoObject"])
+
+
+def complete_address(prefix, limit=10):
+    """
+    Completes a partially typed address from addresses geocoded earlier,
+    without calling the API. The first call also loads every address from
+    the Geocoder cache into the index.
+
+    Returns:
+        list: Up to ``limit`` (address, lon, lat) tuples, closest match first.
+    """
+    global _address_index_loaded
+    with _address_index_lock:
+        if not _address_index_loaded:
+            if CACHE_ENABLED:
+                _load_address_index()
+            _address_index_loaded = True
+    return address_index.complete(prefix, limit)
+
+
+def _load_address_index():
+    """Fills address_index with the most recently used cached addresses, in one sort."""
+    def cached_addresses():
+        for key, json_response in geocoder_cache.items():
+            query, kind_part, _ = key.split("|", 2)
+            if query.startswith("geohash:") or kind_part != "kind=":
+                continue
+            result = _indexable_address(query, None, json_response)
+            if result is not None:
+                yield result
+
+    recent = list(islice(cached_addresses(), ADDRESS_INDEX_MAX_ENTRIES))
+    address_index.add_many(reversed(recent))  # Oldest first: they are evicted first
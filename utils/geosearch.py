@@ -0,0 +1,199 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.api_client import api_get
+from utils.cache import SqliteCache, refresh_in_background
+from utils.config import (
+    GEOSEARCH_API_KEY, GEOSEARCH_API_SERVER, CACHE_ENABLED, CACHE_DIR,
+    GEOSEARCH_PAGE_SIZE, GEOSEARCH_MAX_RESULTS, GEOSEARCH_PREFETCH_PAGES,
+    GEOSEARCH_CACHE_TTL, GEOSEARCH_CACHE_STALE, GEOSEARCH_CACHE_MAX_ENTRIES, NEGATIVE_CACHE_TTL
+)
+from utils.json_stream import iter_array_items
+from utils.metrics import instrumented_call, metrics
+from utils.records import Organization
+from utils.spatial_index import category_key, organization_index
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Search results as Organization rows, so repeated searches survive restarts
+geosearch_cache = SqliteCache(
+    os.path.join(CACHE_DIR, "geosearch.sqlite3"), "geosearch",
+    GEOSEARCH_CACHE_TTL, GEOSEARCH_CACHE_MAX_ENTRIES, stale_seconds=GEOSEARCH_CACHE_STALE
+)
+# Searches that found nothing, kept for NEGATIVE_CACHE_TTL only
+geosearch_negative_cache = SqliteCache(
+    os.path.join(CACHE_DIR, "geosearch.sqlite3"), "geosearch_negative",
+    NEGATIVE_CACHE_TTL, GEOSEARCH_CACHE_MAX_ENTRIES
+)
+
+
+def geosearch_cache_key(coords_lonlat, text_query, num_results, org_type="biz"):
+    """Builds the cache key of a search: category + point (rounded to ~1 m) + count."""
+    lon, lat = coords_lonlat
+    return f"{category_key(text_query, org_type)}|ll={lon:.5f},{lat:.5f}|results={num_results}"
+
+
+def _search_params(coords_lonlat, text_query, num_results, org_type, skip=0):
+    params = {
+        "apikey": GEOSEARCH_API_KEY,
+        "text": text_query,
+        "lang": "ru_RU",
+        "ll": f"{coords_lonlat[0]},{coords_lonlat[1]}",
+        "type": org_type,
+        "results": num_results
+    }
+    if skip:
+        params["skip"] = skip
+    return params
+
+
+def iter_geosearch_features(coords_lonlat, text_query, num_results, org_type="biz", skip=0):
+    """
+    Calls Geosearch and yields features one by one while the response is read.
+
+    The body is never parsed as a whole: each feature is decoded separately
+    and yielded, so peak memory doesn't grow with the response size.
+
+    Raises:
+        requests.exceptions.RequestException: On network/HTTP errors.
+        ValueError: On a malformed response body.
+    """
+    with instrumented_call("geosearch", "miss" if CACHE_ENABLED else "off", text=text_query) as call:
+        response = api_get(GEOSEARCH_API_SERVER, stream=True,
+                           params=_search_params(coords_lonlat, text_query, num_results, org_type, skip))
+        with response:
+            call.status = response.status_code
+            response.raise_for_status()
+
+            def counted_chunks():
+                for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                    call.size += len(chunk)
+                    yield chunk
+
+            yield from iter_array_items(counted_chunks(), "features")
+
+
+def _fetch_page(coords_lonlat, text_query, org_type, skip, page_size):
+    """
+    Fetches one Geosearch page. Returns (list of Organization records, number
+    of features in the page): invalid features are dropped from the list but
+    still count, so a full page isn't mistaken for the last one.
+    """
+    organizations = []
+    feature_count = 0
+    for feature in iter_geosearch_features(coords_lonlat, text_query, page_size, org_type, skip):
+        feature_count += 1
+        try:
+            organizations.append(Organization.from_feature(feature))
+        except (KeyError, TypeError, ValueError):
+            continue  # A feature without valid coordinates can't be shown or indexed
+    return organizations, feature_count
+
+
+def iter_organizations(coords_lonlat, text_query, org_type="biz", limit=None,
+                       page_size=GEOSEARCH_PAGE_SIZE, prefetch=GEOSEARCH_PREFETCH_PAGES):
+    """
+    Yields organizations found around the coordinates page by page (``skip``),
+    in API order, each organization once (by id).
+
+    Up to ``prefetch`` pages are requested at once, so the next pages are
+    usually ready by the time the consumer gets to them. Stops at ``limit``
+    organizations, at the first short page (nothing more to fetch), at
+    GEOSEARCH_MAX_RESULTS, or when the consumer stops iterating; pages
+    requested but not needed are discarded.
+
+    Raises:
+        requests.exceptions.RequestException: On network/HTTP errors.
+    """
+    if limit is not None:
+        if limit <= 0:
+            return
+        page_size = min(page_size, limit)
+
+    seen = set()
+    skipped = 0  # Duplicates and invalid features: results that don't count toward the limit
+    next_skip = 0
+    pending = deque()  # Futures of pages in skip order
+    executor = ThreadPoolExecutor(max_workers=prefetch, thread_name_prefix="geosearch-page")
+    try:
+        while True:
+            # Don't request pages the limit can't need (skipped results push it further)
+            while len(pending) < prefetch and next_skip < GEOSEARCH_MAX_RESULTS and (
+                    limit is None or next_skip < limit + skipped):
+                pending.append(executor.submit(_fetch_page, coords_lonlat, text_query, org_type,
+                                               next_skip, page_size))
+                next_skip += page_size
+            if not pending:
+                return
+
+            page, feature_count = pending.popleft().result()
+            skipped += feature_count - len(page)
+            for organization in page:
+                if organization.key in seen:
+                    skipped += 1
+                    continue
+                seen.add(organization.key)
+                yield organization
+                if limit is not None and len(seen) >= limit:
+                    return
+            if feature_count < page_size:
+                return
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _search_and_store(coords_lonlat, text_query, num_results, org_type):
+    organizations = list(iter_organizations(coords_lonlat, text_query, org_type, limit=num_results))
+    if CACHE_ENABLED:
+        organization_index.add_search_results(coords_lonlat, text_query, organizations, org_type)
+        key = geosearch_cache_key(coords_lonlat, text_query, num_results, org_type)
+        if organizations:
+            geosearch_cache.set(key, [[getattr(organization, name) for name in Organization.__slots__]
+                                      for organization in organizations])
+        else:
+            geosearch_negative_cache.set(key, [])
+    return organizations
+
+
+def fetch_organizations(coords_lonlat, text_query, num_results, org_type="biz"):
+    """
+    Returns up to ``num_results`` organizations nearest to the coordinates
+    as Organization records.
+
+    The in-memory organization index answers first, then the on-disk cache
+    of earlier identical searches (an entry past GEOSEARCH_CACHE_TTL is
+    still returned and re-searched in the background; empty results are
+    kept for NEGATIVE_CACHE_TTL only). The API is called only when neither
+    has the answer. Larger counts are collected over several pages
+    (iter_organizations); the results are added to the index.
+
+    Returns:
+        tuple: (list of Organization, True if served without calling the API).
+
+    Raises:
+        requests.exceptions.RequestException: On network/HTTP errors.
+    """
+    if CACHE_ENABLED:
+        start = time.perf_counter()
+        local = organization_index.nearest(coords_lonlat, text_query, num_results, org_type)
+        if local is not None:
+            metrics.record("geosearch", time.perf_counter() - start, 0, "cached", "hit")
+            return [organization for _, organization in local], True
+
+        key = geosearch_cache_key(coords_lonlat, text_query, num_results, org_type)
+        rows, stale = geosearch_cache.lookup(key)
+        cache = "stale" if stale else "hit"
+        if rows is None and geosearch_negative_cache.get(key) is not None:
+            rows, cache = [], "negative"
+        if rows is not None:
+            organizations = [Organization(*row) for row in rows]
+            organization_index.add_search_results(coords_lonlat, text_query, organizations, org_type)
+            metrics.record("geosearch", time.perf_counter() - start, 0, "cached", cache)
+            if stale:
+                refresh_in_background(key, lambda: _search_and_store(coords_lonlat, text_query,
+                                                                      num_results, org_type))
+            return organizations, True
+
+    return _search_and_store(coords_lonlat, text_query, num_results, org_type), False
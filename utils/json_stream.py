@@ -0,0 +1,105 @@
+import codecs
+import json
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+class _ChunkBuffer:
+    """Text buffer over an iterator of byte chunks, decoded incrementally as UTF-8."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def read_more(self):
+        """Appends the next chunk; returns False at the end of the stream."""
+        if self.eof:
+            return False
+        # Drop what was already consumed so the buffer stays about one chunk long
+        self.text = self.text[self.pos:]
+        self.pos = 0
+        for chunk in self._chunks:
+            if chunk:
+                self.text += self._utf8.decode(chunk)
+                return True
+        self.text += self._utf8.decode(b"", final=True)
+        self.eof = True
+        return False
+
+    def peek(self):
+        """Skips whitespace and returns the next character ('' at the end)."""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.read_more():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"JSON stream: expected '{char}' at offset {self.pos}")
+        self.pos += 1
+
+    def decode_value(self):
+        """Decodes one complete JSON value at the current position (C parser)."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if self.read_more():
+                    continue
+                raise
+            # A number/literal touching the buffer end may continue in the next chunk
+            if end == len(self.text) and not self.eof and self.read_more():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_array_items(chunks, array_key):
+    """
+    Yields the items of the array under a top-level key of a JSON object
+    (e.g. "features" of a GeoJSON FeatureCollection) while the body is read.
+
+    Only one item is decoded at a time (by the C parser, as a whole: skipping
+    parts of an item in Python would be slower than decoding them). Other
+    top-level values are parsed and dropped.
+
+    Args:
+        chunks (iterable): Byte chunks of the response body.
+        array_key (str): Top-level key of the array.
+
+    Raises:
+        ValueError: On malformed JSON (json.JSONDecodeError is a ValueError).
+    """
+    buffer = _ChunkBuffer(chunks)
+    buffer.expect("{")
+    if buffer.peek() == "}":
+        return
+
+    while True:
+        key = buffer.decode_value()
+        buffer.expect(":")
+        if key != array_key:
+            buffer.decode_value()
+        else:
+            buffer.expect("[")
+            if buffer.peek() != "]":
+                while True:
+                    item = buffer.decode_value()
+                    yield item
+                    if buffer.peek() != ",":
+                        break
+                    buffer.pos += 1
+            buffer.expect("]")
+
+        if buffer.peek() != ",":
+            break
+        buffer.pos += 1
+    buffer.expect("}")
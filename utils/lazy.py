@@ -0,0 +1,46 @@
+import importlib
+import importlib.util
+import sys
+import threading
+import types
+
+
+class _LazyModule(types.ModuleType):
+    """Stand-in for a module that imports it on the first attribute access."""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_lazy_lock"] = threading.Lock()
+        self.__dict__["_lazy_module"] = None
+
+    def __getattr__(self, attr):
+        module = self._lazy_module
+        if module is None:
+            # importlib.util.LazyLoader executes the module in place on first
+            # access, and other threads see it half-initialized meanwhile
+            # ("module 'numpy' has no attribute 'radians'"); here they wait
+            with self._lazy_lock:
+                module = self._lazy_module
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__["_lazy_module"] = module
+        value = getattr(module, attr)
+        self.__dict__[attr] = value  # Later lookups don't reach __getattr__
+        return value
+
+
+def lazy_import(name):
+    """
+    Returns a stand-in for module ``name``: the real import happens,
+    once and thread-safely, on the first attribute access. Until then
+    ``name`` is not in sys.modules.
+
+    Used for heavy dependencies (NumPy, Pillow, pygame) that only some code
+    paths touch, so the CLIs start without paying for them.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    if importlib.util.find_spec(name) is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    return _LazyModule(name)
@@ -0,0 +1,59 @@
+import json
+import logging
+import sys
+
+from utils.config import LOG_FORMAT, LOG_LEVEL
+
+ROOT_LOGGER_NAME = "yandex_maps"
+
+
+class StructuredFormatter(logging.Formatter):
+    """
+    Formats records as a message followed by key=value fields ("text"),
+    or as one JSON object per line ("json").
+
+    Structured fields are passed as ``extra={"fields": {...}}``.
+    """
+
+    def __init__(self, as_json=False):
+        super().__init__()
+        self.as_json = as_json
+
+    def format(self, record):
+        fields = getattr(record, "fields", None) or {}
+        if self.as_json:
+            payload = {
+                "ts": round(record.created, 3),
+                "level": record.levelname.lower(),
+                "logger": record.name,
+                "msg": record.getMessage(),
+            }
+            payload.update(fields)
+            if record.exc_info:
+                payload["exc"] = self.formatException(record.exc_info)
+            return json.dumps(payload, ensure_ascii=False, default=str)
+
+        message = record.getMessage()
+        if fields:
+            message += "  " + " ".join(f"{name}={value}" for name, value in fields.items())
+        if record.exc_info:
+            message += "\n" + self.formatException(record.exc_info)
+        return message
+
+
+def _configure_root():
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+    if root.handlers:
+        return
+    # stderr: stdout stays free for results (e.g. JSONL from bulk_geocode)
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(StructuredFormatter(as_json=LOG_FORMAT == "json"))
+    root.addHandler(handler)
+    root.setLevel(LOG_LEVEL.upper())
+    root.propagate = False
+
+
+def get_logger(name):
+    """Returns a project logger (configured on first use)."""
+    _configure_root()
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
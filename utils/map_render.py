@@ -0,0 +1,221 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import numpy as np
+from PIL import Image, ImageChops, ImageDraw, ImageFont
+
+from utils.config import (
+    STATIC_MAPS_API_KEY, STATIC_MAPS_SIZE, STATIC_MAPS_MAX_MARKERS, MARKER_CLUSTER_CELL_PX,
+    MAP_LOCAL_MARKERS, BASE_MAP_SNAP_PX
+)
+from utils.log import get_logger
+from utils.map_utils import (
+    fit_points_view, lonlat_to_world_px, world_px_to_lonlat, lonlat_to_image_px, zoom_to_fit
+)
+from utils.static_maps import get_static_map_bytes
+
+logger = get_logger("map_render")
+
+CLUSTER_STYLE = "pm2vvl"  # Cluster of markers with different styles (violet, large)
+MAX_MARKER_NUMBER = 99  # Static API markers can show numbers 1-99
+# Static API marker styles that accept a number: pm2 + color + size
+_NUMBERED_STYLE = re.compile(r"pm2[a-z]{2}[sml]")
+# A pixel belongs to a marker layer if it differs from the base map by more than this
+LAYER_DIFF_THRESHOLD = 16
+
+# Colors of Static API "pm2" marker styles, for markers drawn locally
+MARKER_COLORS = {
+    "wt": (255, 255, 255), "do": (230, 120, 20), "db": (20, 60, 160), "bl": (30, 150, 255),
+    "gn": (60, 180, 60), "dg": (40, 110, 40), "gr": (150, 150, 150), "lb": (120, 200, 255),
+    "nt": (90, 60, 40), "or": (255, 160, 0), "pn": (255, 100, 180), "rd": (230, 40, 40),
+    "vv": (140, 70, 200), "yw": (255, 220, 0),
+}
+MARKER_RADIUS_PX = {"s": 6, "m": 8, "l": 11}
+# Room left around the points on a base map: snapping error plus a marker
+BASE_MAP_PADDING_PX = BASE_MAP_SNAP_PX // 2 + 16
+
+
+def markers_param(points):
+    """Formats (lon, lat, style) points as the Static API "pt" value."""
+    return "~".join(f"{lon:.6f},{lat:.6f},{style}" for lon, lat, style in points)
+
+
+def _cluster_style(style, count):
+    if count > 1 and _NUMBERED_STYLE.fullmatch(style):
+        return f"{style}{min(count, MAX_MARKER_NUMBER)}"
+    return style
+
+
+def cluster_points(points, cell_lon, cell_lat):
+    """
+    Merges (lon, lat, style) points that fall into the same grid cell
+    (``cell_lon`` x ``cell_lat`` degrees) into one marker at their centroid.
+
+    A cluster keeps its members' style if they all share one (CLUSTER_STYLE
+    otherwise) and shows the member count as the marker number.
+
+    Returns:
+        list: (lon, lat, style) markers, one per occupied cell.
+    """
+    lonlat = np.array([(lon, lat) for lon, lat, _ in points], dtype=np.float64)
+    cells = np.floor(lonlat / (cell_lon, cell_lat)).astype(np.int64)
+    _, inverse, counts = np.unique(cells, axis=0, return_inverse=True, return_counts=True)
+    inverse = inverse.reshape(-1)
+    center_lon = np.bincount(inverse, weights=lonlat[:, 0]) / counts
+    center_lat = np.bincount(inverse, weights=lonlat[:, 1]) / counts
+
+    styles = [None] * len(counts)
+    for cluster, (_, _, style) in zip(inverse.tolist(), points):
+        if styles[cluster] is None:
+            styles[cluster] = style
+        elif styles[cluster] != style:
+            styles[cluster] = CLUSTER_STYLE
+
+    return [
+        (float(center_lon[i]), float(center_lat[i]), _cluster_style(styles[i], int(counts[i])))
+        for i in range(len(counts))
+    ]
+
+
+def _open_image(image_bytes):
+    return Image.open(BytesIO(image_bytes)).convert("RGB")
+
+
+def _composite_layers(params, markers, max_markers):
+    """
+    Renders markers in batches of ``max_markers`` over the same view and
+    pastes each batch's marker pixels (where it differs from the markerless
+    base map) onto the base map.
+    """
+    batches = [markers[i:i + max_markers] for i in range(0, len(markers), max_markers)]
+    requests_params = [params] + [{**params, "pt": markers_param(batch)} for batch in batches]
+    with ThreadPoolExecutor(max_workers=len(requests_params)) as executor:
+        images = [_open_image(data) for data in executor.map(get_static_map_bytes, requests_params)]
+
+    base, layers = images[0], images[1:]
+    result = base.copy()
+    for layer in layers:
+        diff = ImageChops.difference(base, layer)
+        red, green, blue = diff.split()
+        mask = ImageChops.lighter(ImageChops.lighter(red, green), blue)
+        result.paste(layer, mask=mask.point(lambda v: 255 if v > LAYER_DIFF_THRESHOLD else 0))
+    return result
+
+
+def get_base_map(points_lonlat, size=STATIC_MAPS_SIZE):
+    """
+    Fetches a markerless map that shows all points and returns it with its
+    projection parameters.
+
+    The view is given by ll + z (not spn), so marker positions can be
+    computed exactly; the center is snapped to a BASE_MAP_SNAP_PX grid, so
+    marker sets over roughly the same area reuse one cached base image.
+
+    Returns:
+        tuple: (PIL.Image, center (lon, lat), zoom).
+    """
+    zoom = zoom_to_fit(points_lonlat, size, BASE_MAP_PADDING_PX)
+    world = lonlat_to_world_px(points_lonlat, zoom).reshape(-1, 2)
+    center_px = np.round((world.min(axis=0) + world.max(axis=0)) / 2 / BASE_MAP_SNAP_PX) * BASE_MAP_SNAP_PX
+    center_lon, center_lat = (float(v) for v in world_px_to_lonlat(center_px, zoom))
+    image = _open_image(get_static_map_bytes({
+        "l": "map",
+        "apikey": STATIC_MAPS_API_KEY,
+        "ll": f"{center_lon:.6f},{center_lat:.6f}",
+        "z": zoom,
+        "size": f"{size[0]},{size[1]}"
+    }, precision=None))  # Rounding ll would shift the projection
+    return image, (center_lon, center_lat), zoom
+
+
+def _parse_style(style):
+    """Returns (color, radius, number or None) of a pm2 style, with fallbacks."""
+    color = MARKER_COLORS.get(style[3:5], MARKER_COLORS["rd"]) if style.startswith("pm2") else MARKER_COLORS["rd"]
+    radius = MARKER_RADIUS_PX.get(style[5:6], MARKER_RADIUS_PX["m"])
+    number = style[6:] if style[6:].isdigit() else None
+    return color, radius, number
+
+
+def draw_markers(image, points, center_lonlat, zoom):
+    """Draws (lon, lat, style) markers on a map image with a known center and zoom."""
+    if not points:
+        return image
+    pixels = lonlat_to_image_px([(lon, lat) for lon, lat, _ in points], center_lonlat, zoom, image.size)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default()
+    for (x, y), (_, _, style) in zip(pixels.tolist(), points):
+        color, radius, number = _parse_style(style)
+        draw.ellipse((x - radius, y - radius, x + radius, y + radius),
+                     fill=color, outline=(255, 255, 255), width=2)
+        if number:
+            draw.text((x, y), number, fill=(255, 255, 255), font=font, anchor="mm")
+    return image
+
+
+def render_points_overlay(points, size=STATIC_MAPS_SIZE, max_markers=STATIC_MAPS_MAX_MARKERS,
+                          cell_px=MARKER_CLUSTER_CELL_PX):
+    """
+    Renders (lon, lat, style) points by drawing them locally over a cached
+    markerless base map (see get_base_map); more than ``max_markers``
+    points are clustered first.
+
+    Returns:
+        PIL.Image: The map (RGB).
+
+    Raises:
+        requests.exceptions.RequestException: On network/HTTP errors.
+    """
+    image, center, zoom = get_base_map([(lon, lat) for lon, lat, _ in points], size)
+    if len(points) > max_markers:
+        # cell_px at this zoom, in degrees (latitude: near the center)
+        degrees_per_px = 360.0 / (256 * 2 ** zoom)
+        cell_lat = cell_px * degrees_per_px * float(np.cos(np.radians(center[1])))
+        points = cluster_points(points, cell_px * degrees_per_px, cell_lat)
+    return draw_markers(image, points, center, zoom)
+
+
+def render_points_map(points, size=STATIC_MAPS_SIZE, max_markers=STATIC_MAPS_MAX_MARKERS,
+                      cell_px=MARKER_CLUSTER_CELL_PX):
+    """
+    Renders a map with (lon, lat, style) points of any count.
+
+    With MAP_LOCAL_MARKERS on, markers are drawn locally over a cached
+    base map (render_points_overlay). Otherwise the Static API draws them:
+    up to ``max_markers`` points go to the Static API as is (one request,
+    the API fits the view). More points are clustered on a grid of
+    ``cell_px`` pixel cells over a view fitted to all of them; if there are
+    still more clusters than one request allows, several requests are
+    composited with Pillow.
+
+    Returns:
+        PIL.Image: The map (RGB).
+
+    Raises:
+        requests.exceptions.RequestException: On network/HTTP errors.
+    """
+    if MAP_LOCAL_MARKERS:
+        return render_points_overlay(points, size, max_markers, cell_px)
+
+    if len(points) <= max_markers:
+        return _open_image(get_static_map_bytes({
+            "l": "map",
+            "apikey": STATIC_MAPS_API_KEY,
+            "pt": markers_param(points)
+        }))
+
+    width, height = size
+    center_lon, center_lat, spn_lon, spn_lat = fit_points_view([(lon, lat) for lon, lat, _ in points])
+    markers = cluster_points(points, spn_lon * cell_px / width, spn_lat * cell_px / height)
+    params = {
+        "l": "map",
+        "apikey": STATIC_MAPS_API_KEY,
+        "ll": f"{center_lon:.6f},{center_lat:.6f}",
+        "spn": f"{spn_lon:.6f},{spn_lat:.6f}",
+        "size": f"{width},{height}"
+    }
+    logger.info(f"   Меток: {len(points)}, после кластеризации: {len(markers)}")
+
+    if len(markers) <= max_markers:
+        return _open_image(get_static_map_bytes({**params, "pt": markers_param(markers)}))
+    return _composite_layers(params, markers, max_markers)
@@ -1,15 +1,19 @@
-def get_map_params(geo_object):
-    try:
-        point = geo_object["Point"]["pos"]
-        longitude, latitude = map(float, point.split(" "))
-        ll = f"{longitude:.6f},{latitude:.6f}"
+import math
+
+from utils.lazy import lazy_import
+from utils.log import get_logger
+from utils.records import GeoObject
 
-        envelope = geo_object["boundedBy"]["Envelope"]
-        lower_corner = envelope["lowerCorner"]
-        upper_corner = envelope["upperCorner"]
+np = lazy_import("numpy")
 
-        lc_lon, lc_lat = map(float, lower_corner.split(" "))
-        uc_lon, uc_lat = map(float, upper_corner.split(" "))
+logger = get_logger("map_utils")
+
+
+def get_map_params(geo_object):
+    """Calculates Static API "ll" and "spn" for a GeoObject record (utils/records.py)."""
+    try:
+        ll = f"{geo_object.lon:.6f},{geo_object.lat:.6f}"
+        lc_lon, lc_lat, uc_lon, uc_lat = geo_object.envelope
 
         delta_lon = abs(uc_lon - lc_lon)
         delta_lat = abs(uc_lat - lc_lat)
@@ -26,12 +30,85 @@ def get_map_params(geo_object):
 
         return {"ll": ll, "spn": spn}
 
-    except (KeyError, IndexError, ValueError) as e:
-        print(f"Ошибка при расчете параметров карты: {e}")
-        print("Не удалось извлечь 'Point' или 'boundedBy' из объекта.")
+    except (AttributeError, TypeError, ValueError) as e:
+        logger.error(f"Ошибка при расчете параметров карты: {e}")
+        logger.warning("Не удалось извлечь 'Point' или 'boundedBy' из объекта.")
         return None
 
 
+def fit_points_view(points_lonlat, buffer_factor=0.2, min_spn=0.002):
+    """
+    Calculates a view that shows all points with a margin.
+
+    Returns:
+        tuple: (center_lon, center_lat, spn_lon, spn_lat) floats.
+    """
+    lons = [lon for lon, _ in points_lonlat]
+    lats = [lat for _, lat in points_lonlat]
+    spn_lon = max((max(lons) - min(lons)) * (1 + buffer_factor), min_spn)
+    spn_lat = max((max(lats) - min(lats)) * (1 + buffer_factor), min_spn)
+    return (max(lons) + min(lons)) / 2, (max(lats) + min(lats)) / 2, spn_lon, spn_lat
+
+
+TILE_SIZE = 256  # World width in pixels at zoom 0
+# Yandex maps use the Mercator projection on the WGS 84 ellipsoid (EPSG:3395);
+# eccentricity=0 gives spherical Web Mercator (EPSG:3857)
+WGS84_ECCENTRICITY = 0.0818191908426
+MAX_LATITUDE = 85.08
+
+
+def lonlat_to_world_px(points_lonlat, zoom, eccentricity=WGS84_ECCENTRICITY):
+    """
+    Projects (lon, lat) points to global pixel coordinates at ``zoom``
+    (x to the east, y to the south; the world is TILE_SIZE * 2**zoom pixels wide).
+
+    Args:
+        points_lonlat: (lon, lat) pair or sequence/array of pairs.
+
+    Returns:
+        np.ndarray: Array of the same shape with (x, y) pixel coordinates.
+    """
+    points = np.asarray(points_lonlat, dtype=np.float64)
+    lon = points[..., 0]
+    phi = np.radians(np.clip(points[..., 1], -MAX_LATITUDE, MAX_LATITUDE))
+    e_sin = eccentricity * np.sin(phi)
+    y = np.log(np.tan(np.pi / 4 + phi / 2) * ((1 - e_sin) / (1 + e_sin)) ** (eccentricity / 2))
+    world_size = TILE_SIZE * 2.0 ** zoom
+    return np.stack([(lon + 180.0) / 360.0 * world_size,
+                     (0.5 - y / (2 * np.pi)) * world_size], axis=-1)
+
+
+def world_px_to_lonlat(points_px, zoom, eccentricity=WGS84_ECCENTRICITY):
+    """Inverse of lonlat_to_world_px (latitude is found by fixed-point iteration)."""
+    points = np.asarray(points_px, dtype=np.float64)
+    world_size = TILE_SIZE * 2.0 ** zoom
+    lon = points[..., 0] / world_size * 360.0 - 180.0
+    t = np.exp(-(0.5 - points[..., 1] / world_size) * 2 * np.pi)
+    phi = np.pi / 2 - 2 * np.arctan(t)
+    for _ in range(8):  # Converges to ~1e-12 rad in a few steps
+        e_sin = eccentricity * np.sin(phi)
+        phi = np.pi / 2 - 2 * np.arctan(t * ((1 - e_sin) / (1 + e_sin)) ** (eccentricity / 2))
+    return np.stack([lon, np.degrees(phi)], axis=-1)
+
+
+def lonlat_to_image_px(points_lonlat, center_lonlat, zoom, size, eccentricity=WGS84_ECCENTRICITY):
+    """
+    Projects (lon, lat) points to pixel coordinates on a map image of
+    ``size`` (width, height) centered at ``center_lonlat`` at ``zoom``.
+    """
+    center = lonlat_to_world_px(center_lonlat, zoom, eccentricity)
+    return lonlat_to_world_px(points_lonlat, zoom, eccentricity) - center + np.asarray(size) / 2.0
+
+
+def zoom_to_fit(points_lonlat, size, padding_px=0, max_zoom=17):
+    """Returns the largest integer zoom at which all points fit into ``size`` minus padding."""
+    world = lonlat_to_world_px(points_lonlat, 0).reshape(-1, 2)
+    extent = np.maximum(world.max(axis=0) - world.min(axis=0), 1e-12)
+    room = np.maximum(np.asarray(size, dtype=np.float64) - 2 * padding_px, 1.0)
+    zoom = math.floor(math.log2(float(np.min(room / extent))))
+    return max(0, min(zoom, max_zoom))
+
+
 if __name__ == '__main__':
     test_geo_object = {
         "Point": {"pos": "37.617635 55.755814"},
@@ -42,7 +119,7 @@ if __name__ == '__main__':
             }
         }
     }
-    params = get_map_params(test_geo_object)
+    params = get_map_params(GeoObject.from_json(test_geo_object))
     if params:
         print("Рассчитанные параметры:")
         print(f"  ll = {params['ll']}")
@@ -57,7 +134,7 @@ if __name__ == '__main__':
             }
         }
     }
-    params_point = get_map_params(test_point_object)
+    params_point = get_map_params(GeoObject.from_json(test_point_object))
     if params_point:
         print("\nРассчитанные параметры для точечного объекта:")
         print(f"  ll = {params_point['ll']}")
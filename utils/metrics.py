@@ -0,0 +1,204 @@
+import atexit
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from utils.config import METRICS_FILE
+from utils.log import get_logger
+
+logger = get_logger("api")
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """Fixed-bucket histogram (Prometheus semantics: bucket i counts values <= bound i)."""
+
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # The last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Estimates a quantile by linear interpolation inside its bucket."""
+        if self.count == 0:
+            return None
+        target = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= target and bucket_count:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                if i == len(self.bounds):
+                    return lower  # +Inf bucket: the last finite bound is all we know
+                return lower + (self.bounds[i] - lower) * (target - seen) / bucket_count
+            seen += bucket_count
+        return self.bounds[-1]
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": {str(bound): sum(self.counts[:i + 1]) for i, bound in enumerate(self.bounds)},
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class ApiMetrics:
+    """
+    Per-endpoint API call metrics: duration histograms (split by cache
+    hit/miss), response size histograms and call counters by status.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._durations = {}  # (endpoint, cache) -> Histogram
+            self._sizes = {}  # endpoint -> Histogram
+            self._calls = {}  # (endpoint, status, cache) -> int
+
+    def record(self, endpoint, duration_s, size_bytes, status, cache):
+        with self._lock:
+            duration = self._durations.get((endpoint, cache))
+            if duration is None:
+                duration = self._durations[(endpoint, cache)] = Histogram(DURATION_BUCKETS)
+            duration.observe(duration_s)
+
+            if status != "cached":  # Sizes describe what came over the network
+                size = self._sizes.get(endpoint)
+                if size is None:
+                    size = self._sizes[endpoint] = Histogram(SIZE_BUCKETS)
+                size.observe(size_bytes)
+
+            key = (endpoint, str(status), cache)
+            self._calls[key] = self._calls.get(key, 0) + 1
+
+    def snapshot(self):
+        """Returns all metrics as a JSON-serializable dict."""
+        with self._lock:
+            return {
+                "duration_seconds": [
+                    {"endpoint": endpoint, "cache": cache, **histogram.to_dict()}
+                    for (endpoint, cache), histogram in sorted(self._durations.items())
+                ],
+                "response_bytes": [
+                    {"endpoint": endpoint, **histogram.to_dict()}
+                    for endpoint, histogram in sorted(self._sizes.items())
+                ],
+                "calls": [
+                    {"endpoint": endpoint, "status": status, "cache": cache, "count": count}
+                    for (endpoint, status, cache), count in sorted(self._calls.items())
+                ],
+            }
+
+    def prometheus_text(self):
+        """Returns all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            self._histogram_lines(
+                lines, "yandex_api_call_duration_seconds", "Duration of API calls (including cache lookups).",
+                {f'endpoint="{endpoint}",cache="{cache}"': h for (endpoint, cache), h in sorted(self._durations.items())}
+            )
+            self._histogram_lines(
+                lines, "yandex_api_response_bytes", "Size of API response payloads.",
+                {f'endpoint="{endpoint}"': h for endpoint, h in sorted(self._sizes.items())}
+            )
+            lines.append("# HELP yandex_api_calls_total API calls by endpoint, status and cache result.")
+            lines.append("# TYPE yandex_api_calls_total counter")
+            for (endpoint, status, cache), count in sorted(self._calls.items()):
+                lines.append(f'yandex_api_calls_total{{endpoint="{endpoint}",status="{status}",cache="{cache}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _histogram_lines(lines, name, help_text, histograms):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for labels, histogram in histograms.items():
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.bounds, histogram.counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+    def summary_lines(self):
+        """Human-readable per-endpoint table (for benchmarks and CLIs)."""
+        lines = [f"{'endpoint':<16}{'cache':<10}{'calls':>8}{'mean ms':>10}{'p95 ms':>10}{'total ms':>11}"]
+        with self._lock:
+            for (endpoint, cache), histogram in sorted(self._durations.items()):
+                mean_ms = histogram.sum / histogram.count * 1000
+                lines.append(
+                    f"{endpoint:<16}{cache:<10}{histogram.count:>8}{mean_ms:>10.1f}"
+                    f"{histogram.quantile(0.95) * 1000:>10.1f}{histogram.sum * 1000:>11.1f}"
+                )
+        return lines
+
+    def write(self, path):
+        """Writes metrics to a file: Prometheus text for *.prom, JSON otherwise."""
+        with open(path, "w", encoding="utf-8") as f:
+            if path.endswith(".prom"):
+                f.write(self.prometheus_text())
+            else:
+                json.dump(self.snapshot(), f, ensure_ascii=False, indent=1)
+
+
+metrics = ApiMetrics()
+
+if METRICS_FILE:
+    atexit.register(metrics.write, METRICS_FILE)
+
+
+class CallInfo:
+    """Mutable details of one instrumented call, filled in by the caller."""
+
+    __slots__ = ("status", "size", "cache")
+
+    def __init__(self, cache):
+        self.status = None
+        self.size = 0
+        self.cache = cache
+
+
+@contextmanager
+def instrumented_call(endpoint, cache="miss", **fields):
+    """
+    Times an outbound API call and records it in ``metrics``.
+
+    The body sets ``call.status`` (HTTP status), ``call.size`` (payload bytes)
+    and ``call.cache`` ("hit"/"stale"/"negative"/"miss"/"off"/"refresh") on
+    the yielded CallInfo. Extra keyword fields go to the DEBUG log line of
+    the call.
+    """
+    call = CallInfo(cache)
+    start = time.perf_counter()
+    try:
+        yield call
+    except BaseException:
+        if call.status is None:
+            call.status = "error"
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        if call.status is None:
+            call.status = "cached" if call.cache in ("hit", "stale", "negative") else "ok"
+        metrics.record(endpoint, duration, call.size, call.status, call.cache)
+        logger.debug("API call", extra={"fields": {
+            "endpoint": endpoint, "duration_ms": round(duration * 1000, 2), "bytes": call.size,
+            "status": call.status, "cache": call.cache, **fields
+        }})
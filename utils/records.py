@@ -0,0 +1,205 @@
+from array import array
+
+from utils.geo_utils import nearest_k
+from utils.lazy import lazy_import
+
+np = lazy_import("numpy")  # Only OrganizationTable needs it
+
+# Organization.hours_flags bits
+HOURS_KNOWN = 1  # The organization has opening hours data
+HOURS_AROUND_THE_CLOCK = 2  # Open 24 hours every day
+
+
+def _parse_pos(pos):
+    """Parses a Geocoder "lon lat" string into a (lon, lat) tuple of floats."""
+    longitude, latitude = map(float, pos.split())
+    return longitude, latitude
+
+
+def _hours_flags(hours_info):
+    if not isinstance(hours_info, dict):
+        return 0
+    availabilities = hours_info.get("Availabilities", [])
+    # Check if any availability indicates 24/7
+    if any(avail.get("TwentyFourHours", False) and avail.get("Everyday", False)
+           for avail in availabilities):
+        return HOURS_KNOWN | HOURS_AROUND_THE_CLOCK
+    return HOURS_KNOWN
+
+
+class GeoObject:
+    """
+    A Geocoder GeoObject parsed once: the point and the envelope as floats
+    instead of "lon lat" strings inside nested dicts.
+
+    ``envelope`` is (lower_lon, lower_lat, upper_lon, upper_lat);
+    ``components`` is the address hierarchy as ((kind, name), ...) pairs,
+    from the country down to the object itself.
+    """
+
+    __slots__ = ("name", "address", "kind", "lon", "lat", "envelope", "components")
+
+    def __init__(self, name, address, kind, lon, lat, envelope, components=()):
+        self.name = name
+        self.address = address
+        self.kind = kind
+        self.lon = lon
+        self.lat = lat
+        self.envelope = envelope
+        self.components = components
+
+    @classmethod
+    def from_json(cls, geo_object):
+        """
+        Builds a record from a GeoObject dict of a Geocoder response.
+
+        Raises:
+            KeyError, ValueError: If the object has no valid Point.pos.
+        """
+        lon, lat = _parse_pos(geo_object["Point"]["pos"])
+        envelope_json = geo_object.get("boundedBy", {}).get("Envelope")
+        if envelope_json:
+            envelope = (*_parse_pos(envelope_json["lowerCorner"]), *_parse_pos(envelope_json["upperCorner"]))
+        else:
+            envelope = (lon, lat, lon, lat)
+        meta = geo_object.get("metaDataProperty", {}).get("GeocoderMetaData", {})
+        components = tuple((component.get("kind"), component.get("name"))
+                           for component in meta.get("Address", {}).get("Components", []))
+        return cls(geo_object.get("name"), meta.get("text"), meta.get("kind"), lon, lat, envelope, components)
+
+    @property
+    def coords(self):
+        return self.lon, self.lat
+
+    def component(self, kind):
+        """
+        Name of the most specific address component of ``kind`` (e.g. 'district',
+        'locality', 'province', 'metro'), or None if the address has none.
+
+        A kind can repeat ("Центральный административный округ", then "район
+        Хамовники"); the last, innermost one is what reverse geocoding with
+        ``kind`` would return as well.
+        """
+        for component_kind, name in reversed(self.components):
+            if component_kind == kind and name:
+                return name
+        return None
+
+    def __repr__(self):
+        return f"GeoObject({self.name!r}, {self.kind!r}, ({self.lon}, {self.lat}))"
+
+
+class Organization:
+    """
+    A Geosearch organization parsed once: coordinates as floats and opening
+    hours digested into ``hours_flags`` (HOURS_KNOWN, HOURS_AROUND_THE_CLOCK).
+    """
+
+    __slots__ = ("id", "name", "address", "hours_text", "lon", "lat", "hours_flags")
+
+    def __init__(self, id, name, address, hours_text, lon, lat, hours_flags):
+        self.id = id
+        self.name = name
+        self.address = address
+        self.hours_text = hours_text
+        self.lon = lon
+        self.lat = lat
+        self.hours_flags = hours_flags
+
+    @classmethod
+    def from_feature(cls, feature):
+        """
+        Builds a record from a Geosearch GeoJSON feature.
+
+        Raises:
+            KeyError, TypeError, ValueError: If the feature has no valid coordinates.
+        """
+        lon, lat = map(float, feature["geometry"]["coordinates"])
+        meta = feature.get("properties", {}).get("CompanyMetaData", {})
+        hours_info = meta.get("Hours")
+        hours_text = hours_info.get("text") if isinstance(hours_info, dict) else None
+        return cls(meta.get("id"), meta.get("name"), meta.get("address"), hours_text,
+                   lon, lat, _hours_flags(hours_info))
+
+    @property
+    def coords(self):
+        return self.lon, self.lat
+
+    @property
+    def key(self):
+        """Stable identity: the organization id, or the coordinates if there is none."""
+        return self.id or (self.lon, self.lat)
+
+    @property
+    def has_hours(self):
+        return bool(self.hours_flags & HOURS_KNOWN)
+
+    @property
+    def is_24_7(self):
+        return bool(self.hours_flags & HOURS_AROUND_THE_CLOCK)
+
+    def __repr__(self):
+        return f"Organization({self.name!r}, ({self.lon}, {self.lat}))"
+
+
+class OrganizationTable:
+    """
+    Column-oriented storage for many organizations.
+
+    Coordinates and hour flags live in typed arrays (8 + 8 + 1 bytes per
+    organization) instead of one object per organization; strings are kept
+    in plain lists. Rows are materialized as Organization records on access.
+    """
+
+    def __init__(self, organizations=()):
+        self._lon = array("d")
+        self._lat = array("d")
+        self._hours_flags = array("B")
+        self._ids = []
+        self._names = []
+        self._addresses = []
+        self._hours_texts = []
+        self._coordinates = None  # Cached (n, 2) NumPy copy, reset on append
+        self.extend(organizations)
+
+    def append(self, organization):
+        self._lon.append(organization.lon)
+        self._lat.append(organization.lat)
+        self._hours_flags.append(organization.hours_flags)
+        self._ids.append(organization.id)
+        self._names.append(organization.name)
+        self._addresses.append(organization.address)
+        self._hours_texts.append(organization.hours_text)
+        self._coordinates = None
+
+    def extend(self, organizations):
+        for organization in organizations:
+            self.append(organization)
+
+    def __len__(self):
+        return len(self._lon)
+
+    def __getitem__(self, i):
+        return Organization(self._ids[i], self._names[i], self._addresses[i], self._hours_texts[i],
+                            self._lon[i], self._lat[i], self._hours_flags[i])
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def coordinates(self):
+        """Returns an (n, 2) array of (lon, lat) rows."""
+        if self._coordinates is None:
+            self._coordinates = np.column_stack([np.frombuffer(self._lon, dtype=np.float64),
+                                                 np.frombuffer(self._lat, dtype=np.float64)])
+        return self._coordinates
+
+    def hours_flags(self):
+        """Returns a uint8 array of hours_flags (a copy)."""
+        return np.array(self._hours_flags, dtype=np.uint8)
+
+    def nearest(self, point, k):
+        """Returns up to k nearest organizations as [(distance_km, Organization), ...]."""
+        if not len(self):
+            return []
+        indices, distances = nearest_k(point, self.coordinates(), k)
+        return [(float(distance), self[int(i)]) for i, distance in zip(indices, distances)]
@@ -0,0 +1,113 @@
+import json
+import mmap
+import os
+import struct
+
+from utils.records import GeoObject
+
+# File layout: MAGIC, header (version, index length), JSON index, image blobs.
+# The index lists the cities in order: name, geocoded point and envelope, and
+# [offset, length] of every view image, offsets counted from the first blob.
+MAGIC = b"YMSLIDES"
+VERSION = 1
+_HEADER = struct.Struct("<HI")
+
+
+class SlidePackError(Exception):
+    """The file is not a slide pack of a supported version, or is truncated or corrupt."""
+
+
+def write_slide_pack(path, cities):
+    """
+    Writes a slide pack file atomically (readers never see a partial file).
+
+    Args:
+        path (str): Output file.
+        cities (list): (name, GeoObject record, [image bytes, ...]) tuples.
+    """
+    index = []
+    offset = 0
+    for name, geo_object, images in cities:
+        views = []
+        for image_bytes in images:
+            views.append([offset, len(image_bytes)])
+            offset += len(image_bytes)
+        index.append({"name": name, "point": list(geo_object.coords),
+                      "envelope": list(geo_object.envelope), "views": views})
+    index_bytes = json.dumps(index, ensure_ascii=False).encode("utf-8")
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(_HEADER.pack(VERSION, len(index_bytes)))
+        f.write(index_bytes)
+        for _, _, images in cities:
+            for image_bytes in images:
+                f.write(image_bytes)
+    os.replace(tmp_path, path)
+
+
+class SlidePack:
+    """
+    A slide pack opened with mmap: only the index is parsed up front, image
+    bytes are paged in from the file when a slide is decoded.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            index_start = len(MAGIC) + _HEADER.size
+            if len(self._mmap) < index_start or self._mmap[:len(MAGIC)] != MAGIC:
+                raise SlidePackError(f"{path}: not a slide pack")
+            version, index_length = _HEADER.unpack_from(self._mmap, len(MAGIC))
+            if version != VERSION:
+                raise SlidePackError(f"{path}: unsupported slide pack version {version}")
+            self._blobs_start = index_start + index_length
+            if len(self._mmap) < self._blobs_start:
+                raise SlidePackError(f"{path}: truncated slide pack index")
+            try:
+                self._index = json.loads(self._mmap[index_start:self._blobs_start].decode("utf-8"))
+            except ValueError as e:  # Includes UnicodeDecodeError and json.JSONDecodeError
+                raise SlidePackError(f"{path}: corrupt slide pack index: {e}") from e
+            self._check_views(path, len(self._mmap) - self._blobs_start)
+        except Exception:
+            self._mmap.close()
+            raise
+
+    def _check_views(self, path, blobs_size):
+        """Checks that every view image lies within the blob area of the file."""
+        try:
+            for entry in self._index:
+                for offset, length in entry["views"]:
+                    if not (isinstance(offset, int) and isinstance(length, int)
+                            and 0 <= offset and 0 <= length and offset + length <= blobs_size):
+                        raise SlidePackError(f"{path}: truncated slide pack (view of {entry['name']} "
+                                             f"at {offset}+{length}, {blobs_size} bytes of images)")
+        except (KeyError, TypeError, ValueError) as e:
+            raise SlidePackError(f"{path}: corrupt slide pack index: {e}") from e
+
+    @property
+    def city_names(self):
+        return [entry["name"] for entry in self._index]
+
+    def __len__(self):
+        return len(self._index)
+
+    def geo_object(self, i):
+        """The stored geocoding result of city ``i`` as a GeoObject record."""
+        entry = self._index[i]
+        return GeoObject(entry["name"], entry["name"], "locality", *entry["point"], tuple(entry["envelope"]))
+
+    def view_count(self, i):
+        return len(self._index[i]["views"])
+
+    def image(self, i, view):
+        """Image bytes of view ``view`` of city ``i``: a zero-copy memoryview into the file."""
+        offset, length = self._index[i]["views"][view]
+        start = self._blobs_start + offset
+        return memoryview(self._mmap)[start:start + length]
+
+    def close(self):
+        self._mmap.close()
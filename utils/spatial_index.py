@@ -0,0 +1,120 @@
+import math
+import threading
+
+from utils.geo_utils import haversine_distance, haversine_one_to_many
+from utils.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+CELL_SIZE_DEG = 0.01  # Grid cell size (~1.1 km by latitude)
+KM_PER_DEG_LAT = 111.195
+
+
+def category_key(text_query, org_type="biz"):
+    """Normalizes a Geosearch text query (plus type) into an index category."""
+    return f"{org_type}:{' '.join(text_query.lower().split())}"
+
+
+class OrganizationIndex:
+    """
+    In-memory grid index of found organizations (Organization records),
+    grouped by category text.
+
+    Every API search is recorded as a covered circle: the search point and the
+    distance to the farthest returned organization (the API returns the
+    nearest matches first, so nothing closer was left out). A local "nearest k"
+    query is answered only when its k results provably lie inside such a
+    circle; otherwise the caller should fall back to the API.
+    """
+
+    def __init__(self, cell_size_deg=CELL_SIZE_DEG):
+        self.cell_size_deg = cell_size_deg
+        self._cells = {}  # category -> {(cell_x, cell_y): [Organization, ...]}
+        self._ids = {}  # category -> set of organization keys already stored
+        self._coverage = {}  # category -> [(center_lonlat, radius_km), ...]
+        self._lock = threading.Lock()
+
+    def _cell(self, lon, lat):
+        return math.floor(lon / self.cell_size_deg), math.floor(lat / self.cell_size_deg)
+
+    def add_search_results(self, center_lonlat, text_query, organizations, org_type="biz"):
+        """
+        Stores organizations returned by a Geosearch call made around
+        ``center_lonlat`` and marks the area up to the farthest of them as covered.
+        """
+        category = category_key(text_query, org_type)
+        radius_km = 0.0
+        with self._lock:
+            cells = self._cells.setdefault(category, {})
+            ids = self._ids.setdefault(category, set())
+            for organization in organizations:
+                radius_km = max(radius_km, haversine_distance(center_lonlat, organization.coords))
+                if organization.key in ids:
+                    continue
+                ids.add(organization.key)
+                cells.setdefault(self._cell(organization.lon, organization.lat), []).append(organization)
+
+            if organizations:
+                self._coverage.setdefault(category, []).append((tuple(center_lonlat), radius_km))
+
+    def clear(self):
+        """Forgets all stored organizations and covered areas."""
+        with self._lock:
+            self._cells.clear()
+            self._ids.clear()
+            self._coverage.clear()
+
+    def nearest(self, lonlat, text_query, k, org_type="biz"):
+        """
+        Returns up to k nearest stored organizations as [(distance_km, Organization), ...],
+        nearest first, or None if the covered area can't guarantee the answer.
+        """
+        category = category_key(text_query, org_type)
+        with self._lock:
+            # Radius around the query point that lies inside some covered circle
+            safe_radius_km = max(
+                (radius - haversine_distance(center, lonlat)
+                 for center, radius in self._coverage.get(category, [])),
+                default=-1.0
+            )
+            if safe_radius_km < 0:
+                return None
+
+            candidates = self._entries_near(category, lonlat, safe_radius_km)
+
+        if not candidates:
+            return None
+        distances = haversine_one_to_many(lonlat, [(org.lon, org.lat) for org in candidates])
+        inside = np.flatnonzero(distances <= safe_radius_km)
+        if len(inside) < k:
+            return None
+
+        order = inside[np.argsort(distances[inside])][:k]
+        return [(float(distances[i]), candidates[i]) for i in order]
+
+    def _entries_near(self, category, lonlat, radius_km):
+        """Collects entries from grid cells overlapping the circle's bounding box."""
+        cells = self._cells.get(category, {})
+        lon, lat = lonlat
+        dlat = radius_km / KM_PER_DEG_LAT
+        cos_lat = max(math.cos(math.radians(min(abs(lat) + dlat, 89.0))), 1e-6)
+        dlon = dlat / cos_lat
+
+        min_x, min_y = self._cell(lon - dlon, lat - dlat)
+        max_x, max_y = self._cell(lon + dlon, lat + dlat)
+        entries = []
+        if (max_x - min_x + 1) * (max_y - min_y + 1) > len(cells):
+            # Huge box over a sparse grid: scan the occupied cells instead
+            for (x, y), cell_entries in cells.items():
+                if min_x <= x <= max_x and min_y <= y <= max_y:
+                    entries.extend(cell_entries)
+            return entries
+
+        for x in range(min_x, max_x + 1):
+            for y in range(min_y, max_y + 1):
+                entries.extend(cells.get((x, y), ()))
+        return entries
+
+
+# Shared by all tasks in the process (e.g. a long-running service or batch loop)
+organization_index = OrganizationIndex()
@@ -0,0 +1,203 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from utils.api_client import api_get
+from utils.log import get_logger
+from utils.metrics import instrumented_call
+from utils.config import (
+    STATIC_MAPS_API_SERVER, CACHE_ENABLED, CACHE_DIR,
+    STATIC_MAPS_CACHE_MAX_BYTES, STATIC_MAPS_CACHE_PRECISION
+)
+
+logger = get_logger("static_maps")
+
+# Parameters whose values are coordinate lists and get rounded in cache keys
+COORDINATE_PARAMS = ("ll", "spn", "pt")
+# Parameters that don't change the image and are left out of cache keys
+IGNORED_PARAMS = ("apikey",)
+
+
+def _round_coordinates(value, precision):
+    """
+    Rounds every number in a comma-separated value ("37.617635,55.755814,pm2rdl")
+    to ``precision`` digits; non-numeric parts (marker styles) are kept as is.
+    """
+    parts = []
+    for part in value.split(","):
+        try:
+            parts.append(f"{float(part):.{precision}f}")
+        except ValueError:
+            parts.append(part)
+    return ",".join(parts)
+
+
+def normalize_static_map_params(params, precision=STATIC_MAPS_CACHE_PRECISION):
+    """
+    Returns a copy of Static API params with coordinates in ll/spn/pt rounded
+    to ``precision`` digits (no rounding if precision is None), so that
+    near-identical views map to the same request.
+    """
+    normalized = {}
+    for name, value in params.items():
+        value = str(value)
+        if precision is not None and name in COORDINATE_PARAMS:
+            value = "~".join(_round_coordinates(point, precision) for point in value.split("~"))
+        normalized[name] = value
+    return normalized
+
+
+def static_map_cache_key(normalized_params):
+    """Builds the cache key from normalized params (sorted, without apikey)."""
+    return "&".join(
+        f"{name}={normalized_params[name]}"
+        for name in sorted(normalized_params) if name not in IGNORED_PARAMS
+    )
+
+
+class StaticMapCache:
+    """
+    Content-addressed on-disk cache for Static API images.
+
+    Image bytes are stored once per SHA-256 digest under ``directory``;
+    an SQLite index maps request keys to digests, so different requests
+    that return the same image share one file. When the stored images
+    exceed ``max_bytes``, the least recently used ones are evicted.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(self.directory, exist_ok=True)
+            conn = sqlite3.connect(os.path.join(self.directory, "index.sqlite3"),
+                                   timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS requests (key TEXT PRIMARY KEY, digest TEXT NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS requests_digest ON requests(digest)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS blobs ("
+                "digest TEXT PRIMARY KEY, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS blobs_accessed ON blobs(accessed)")
+            self._local.conn = conn
+        return conn
+
+    def _blob_path(self, digest):
+        return os.path.join(self.directory, digest[:2], f"{digest}.png")
+
+    def get(self, key):
+        """Returns cached image bytes for the request key or None."""
+        try:
+            conn = self._connect()
+            row = conn.execute("SELECT digest FROM requests WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            digest = row[0]
+            with open(self._blob_path(digest), "rb") as f:
+                data = f.read()
+            conn.execute("UPDATE blobs SET accessed = ? WHERE digest = ?", (time.time(), digest))
+            return data
+
+        except FileNotFoundError:
+            # The blob was evicted by another process after we read the index
+            return None
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"   Предупреждение: кэш карт недоступен: {e}")
+            return None
+
+    def put(self, key, data):
+        """Stores image bytes for the request key."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        try:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)  # Atomic: readers never see a partial file
+
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO blobs (digest, size, accessed) VALUES (?, ?, ?)",
+                (digest, len(data), time.time())
+            )
+            conn.execute("INSERT OR REPLACE INTO requests (key, digest) VALUES (?, ?)", (key, digest))
+            self._evict(conn)
+
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"   Предупреждение: не удалось записать карту в кэш: {e}")
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = []
+        for digest, size in conn.execute("SELECT digest, size FROM blobs ORDER BY accessed"):
+            if total <= self.max_bytes:
+                break
+            evicted.append(digest)
+            total -= size
+
+        for digest in evicted:
+            conn.execute("DELETE FROM requests WHERE digest = ?", (digest,))
+            conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+            try:
+                os.remove(self._blob_path(digest))
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        """Removes all cached images."""
+        try:
+            conn = self._connect()
+            digests = [row[0] for row in conn.execute("SELECT digest FROM blobs")]
+            conn.execute("DELETE FROM requests")
+            conn.execute("DELETE FROM blobs")
+            for digest in digests:
+                try:
+                    os.remove(self._blob_path(digest))
+                except FileNotFoundError:
+                    pass
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"   Предупреждение: не удалось очистить кэш карт: {e}")
+
+
+static_map_cache = StaticMapCache(os.path.join(CACHE_DIR, "static_maps"), STATIC_MAPS_CACHE_MAX_BYTES)
+
+
+def get_static_map_bytes(static_api_params, precision=STATIC_MAPS_CACHE_PRECISION):
+    """
+    Returns the Static API image (bytes) for the given params, using the disk cache.
+
+    Coordinates are rounded to ``precision`` digits before both the cache
+    lookup and the request, so the cached image always matches its key.
+
+    Raises:
+        requests.exceptions.RequestException: On network/HTTP errors (cache miss only).
+    """
+    with instrumented_call("static_map", "miss" if CACHE_ENABLED else "off") as call:
+        normalized_params = normalize_static_map_params(static_api_params, precision)
+        key = static_map_cache_key(normalized_params)
+
+        if CACHE_ENABLED:
+            image_bytes = static_map_cache.get(key)
+            if image_bytes is not None:
+                call.cache = "hit"
+                return image_bytes
+
+        response = api_get(STATIC_MAPS_API_SERVER, params=normalized_params)
+        call.status, call.size = response.status_code, len(response.content)
+        response.raise_for_status()
+        if CACHE_ENABLED:
+            static_map_cache.put(key, response.content)
+        return response.content
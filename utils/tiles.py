@@ -0,0 +1,74 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from PIL import Image
+
+from utils.config import STATIC_MAPS_API_KEY, STATIC_MAPS_SIZE, TILE_FETCH_PX
+from utils.map_utils import TILE_SIZE, lonlat_to_world_px, world_px_to_lonlat, zoom_to_fit
+from utils.static_maps import get_static_map_bytes
+
+MAX_TILE_ZOOM = 17
+TILE_WORKERS = 8  # Tiles of one view fetched at once
+
+
+def get_tile(x, y, zoom, layer="map"):
+    """
+    Returns the map tile (x, y) at ``zoom`` as a TILE_SIZE x TILE_SIZE image.
+
+    The Static API has no tile endpoint, so a TILE_FETCH_PX square centered
+    on the tile is requested and the tile is cut out of its middle; this
+    also leaves out the logo and copyright drawn in the image corners. The
+    request depends only on (x, y, zoom, layer), so it is cached once and
+    shared by every view that covers the tile.
+    """
+    center_lon, center_lat = (float(v) for v in world_px_to_lonlat(
+        ((x + 0.5) * TILE_SIZE, (y + 0.5) * TILE_SIZE), zoom))
+    image_bytes = get_static_map_bytes({
+        "l": layer,
+        "apikey": STATIC_MAPS_API_KEY,
+        "ll": f"{center_lon:.6f},{center_lat:.6f}",
+        "z": zoom,
+        "size": f"{TILE_FETCH_PX},{TILE_FETCH_PX}"
+    }, precision=None)
+    image = Image.open(BytesIO(image_bytes)).convert("RGB")
+    offset = (TILE_FETCH_PX - TILE_SIZE) // 2
+    return image.crop((offset, offset, offset + TILE_SIZE, offset + TILE_SIZE))
+
+
+def zoom_for_span(center_lonlat, spn, size=STATIC_MAPS_SIZE):
+    """Quantizes an ll/spn view to the largest integer zoom that still shows the whole span."""
+    lon, lat = center_lonlat
+    spn_lon, spn_lat = spn
+    corners = [(lon - spn_lon / 2, lat - spn_lat / 2), (lon + spn_lon / 2, lat + spn_lat / 2)]
+    return zoom_to_fit(corners, size, max_zoom=MAX_TILE_ZOOM)
+
+
+def render_tiled_view(center_lonlat, zoom, size=STATIC_MAPS_SIZE, layer="map"):
+    """
+    Assembles the view centered at ``center_lonlat`` at ``zoom`` from grid
+    tiles (fetched concurrently) and crops it to ``size`` (width, height).
+
+    Returns:
+        PIL.Image: The map (RGB).
+
+    Raises:
+        requests.exceptions.RequestException: On network/HTTP errors.
+    """
+    width, height = size
+    center_x, center_y = lonlat_to_world_px(center_lonlat, zoom).tolist()
+    left, top = int(round(center_x - width / 2)), int(round(center_y - height / 2))
+    first_x, first_y = left // TILE_SIZE, top // TILE_SIZE
+    last_x, last_y = (left + width - 1) // TILE_SIZE, (top + height - 1) // TILE_SIZE
+
+    tiles_per_side = 2 ** zoom
+    indices = [(x, y) for y in range(first_y, last_y + 1) for x in range(first_x, last_x + 1)
+               if 0 <= y < tiles_per_side]
+    with ThreadPoolExecutor(max_workers=TILE_WORKERS) as executor:
+        # x wraps around the antimeridian
+        tiles = executor.map(lambda xy: get_tile(xy[0] % tiles_per_side, xy[1], zoom, layer), indices)
+        canvas = Image.new("RGB", ((last_x - first_x + 1) * TILE_SIZE, (last_y - first_y + 1) * TILE_SIZE))
+        for (x, y), tile in zip(indices, tiles):
+            canvas.paste(tile, ((x - first_x) * TILE_SIZE, (y - first_y) * TILE_SIZE))
+
+    crop_left, crop_top = left - first_x * TILE_SIZE, top - first_y * TILE_SIZE
+    return canvas.crop((crop_left, crop_top, crop_left + width, crop_top + height))